@@ -2,67 +2,1143 @@ import datetime
 import sys
 import re
 import os
-import shutil
-from matplotlib.pyplot import (
-    close,
-    tick_params,
-    subplots,
-    savefig,
-    plot,
-    xticks,
-    yticks,
-    imshow,
-    figure,
-    xlim,
-    ylim,
-    text,
-    title,
-    xlabel,
-    ylabel,
-)
-from numpy import array
+import json
+import sqlite3
+import zlib
+import csv
+import socket
+import hashlib
+import tracemalloc
 from io import BytesIO
-from PIL import Image
 from termcolor import colored
-from emoji import emojize
-from time import sleep
-from requests import get
-from fpdf import FPDF
+from time import sleep, perf_counter, time
+from tempfile import TemporaryDirectory
+from random import uniform, Random
+from threading import Lock, Thread, Event, BoundedSemaphore, get_ident, local
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import get_context
+from contextlib import contextmanager, chdir
+from functools import wraps
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs, parse_qsl, quote
+from urllib.request import urlopen
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+api_key = None
+usage = """Usage: python project.py Location Start_date [End_date]
+       python project.py --cache-info
+       python project.py --cache-purge [history|forecast] [--expired]
+       python project.py --warm-icons [directory]
+       python project.py --serve [host:port]
+       python project.py --batch manifest.csv|manifest.json [summary.json]
+       python project.py --enqueue Location Start_date [End_date]
+       python project.py --work [--drain] [--metrics host:port]
+       python project.py --queue-info
+       python project.py --mock-server fixtures_directory [host:port]
+       python project.py --benchmark fixtures_directory [baseline.json] [--save-baseline]
+       python project.py --load-test fixtures_directory [requests] [concurrency,...] [--http]
+       python project.py --archive-info
+       python project.py --trend Location Start_date End_date"""
+history_window_days = 30
+max_workers = int(os.environ.get("WEATHER_MAX_WORKERS", 8))
+request_slots = BoundedSemaphore(max(1, max_workers))
+render_workers = int(os.environ.get("WEATHER_RENDER_WORKERS", 0))
+render_pool = None
+render_pool_lock = Lock()
+pyplot_lock = Lock()
+batch_workers = int(os.environ.get("WEATHER_BATCH_WORKERS", 4))
+server_workers = int(os.environ.get("WEATHER_SERVER_WORKERS", os.cpu_count() or 1))
+server_queue_size = int(os.environ.get("WEATHER_SERVER_QUEUE", 32))
+server_access_log = os.environ.get("WEATHER_SERVER_ACCESS_LOG", "0") == "1"
+connect_timeout = float(os.environ.get("WEATHER_CONNECT_TIMEOUT", 3.05))
+read_timeout = float(os.environ.get("WEATHER_READ_TIMEOUT", 15))
+max_retries = int(os.environ.get("WEATHER_MAX_RETRIES", 3))
+backoff_base, backoff_cap = 0.5, 8
+retry_statuses = (429, 500, 502, 503, 504)
+api_base_url = os.environ.get("WEATHER_API_URL", "https://api.weatherapi.com/v1")
+icon_base_url = os.environ.get("WEATHER_ICON_URL", "")
+fixed_today = os.environ.get("WEATHER_TODAY")
+record_dir = os.environ.get("WEATHER_RECORD")
+replay_dir = os.environ.get("WEATHER_REPLAY")
+mock_latency = float(os.environ.get("WEATHER_MOCK_LATENCY", 0))
+mock_error_rate = float(os.environ.get("WEATHER_MOCK_ERROR_RATE", 0))
+benchmark_warmup = int(os.environ.get("WEATHER_BENCH_WARMUP", 2))
+benchmark_repeats = int(os.environ.get("WEATHER_BENCH_REPEATS", 10))
+benchmark_threshold = float(os.environ.get("WEATHER_BENCH_THRESHOLD", 0.25))
+load_mix = os.environ.get("WEATHER_LOAD_MIX", "current=1,forecast=2,historical=1")
+load_seed = int(os.environ.get("WEATHER_LOAD_SEED", 0))
+trace_path = os.environ.get("WEATHER_TRACE")
+trace_format = os.environ.get("WEATHER_TRACE_FORMAT", "json")
+profile_dir = os.environ.get("WEATHER_PROFILE_DIR")
+profile_lock = Lock()
+metrics_path = os.environ.get("WEATHER_METRICS")
+
+
+class MissingApiKeyError(Exception):
+    pass
+
+
+class Tracer:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.events = []
+        self.lock = Lock()
+        self.origin = perf_counter()
+
+    @contextmanager
+    def span(self, name, **details):
+        start = perf_counter()
+        try:
+            yield details
+        finally:
+            end = perf_counter()
+            metrics.observe("weather_stage_seconds", end - start, stage=name)
+            if self.enabled:
+                with self.lock:
+                    self.events.append(
+                        {
+                            "name": name,
+                            "start": round(start - self.origin, 6),
+                            "duration": round(end - start, 6),
+                            "thread": get_ident(),
+                            "details": details,
+                        }
+                    )
+
+    def export(self, path=None, format=None):
+        with self.lock:
+            events = list(self.events)
+        if (format or trace_format) == "chrome":
+            trace = {
+                "traceEvents": [
+                    {
+                        "name": event["name"],
+                        "ph": "X",
+                        "ts": round(event["start"] * 1e6),
+                        "dur": round(event["duration"] * 1e6),
+                        "pid": os.getpid(),
+                        "tid": event["thread"],
+                        "args": event["details"],
+                    }
+                    for event in events
+                ],
+                "displayTimeUnit": "ms",
+            }
+        else:
+            trace = {"spans": events}
+        with open(path or trace_path, "w") as file:
+            json.dump(trace, file, default=str)
+
+
+class Metrics:
+    seconds_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    bytes_buckets = (5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.lock = Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def total(self, name):
+        with self.lock:
+            return sum(value for key, value in self.counters.items() if key[0] == name)
+
+    def observe(self, name, value, buckets=None, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            if key not in self.histograms:
+                bounds = buckets or self.seconds_buckets
+                self.histograms[key] = {"bounds": bounds, "counts": [0] * len(bounds)}
+                self.histograms[key].update(sum=0, count=0)
+            histogram = self.histograms[key]
+            for index, bound in enumerate(histogram["bounds"]):
+                if value <= bound:
+                    histogram["counts"][index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    @staticmethod
+    def format_labels(labels, **extra):
+        labels = [*labels, *extra.items()]
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name in sorted({key[0] for key in self.counters}):
+                lines.append(f"# TYPE {name} counter")
+                for key in sorted(key for key in self.counters if key[0] == name):
+                    lines.append(
+                        f"{name}{self.format_labels(key[1])} {self.counters[key]}"
+                    )
+            for name in sorted({key[0] for key in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for key in sorted(key for key in self.histograms if key[0] == name):
+                    histogram = self.histograms[key]
+                    for bound, count in zip(histogram["bounds"], histogram["counts"]):
+                        lines.append(
+                            f"{name}_bucket{self.format_labels(key[1], le=bound)} {count}"
+                        )
+                    lines.append(
+                        f"{name}_bucket{self.format_labels(key[1], le='+Inf')} "
+                        f"{histogram['count']}"
+                    )
+                    lines.append(
+                        f"{name}_sum{self.format_labels(key[1])} {histogram['sum']}"
+                    )
+                    lines.append(
+                        f"{name}_count{self.format_labels(key[1])} {histogram['count']}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=None):
+        path = path or metrics_path
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as file:
+            file.write(self.render())
+        os.replace(temporary_path, path)
+
+
+tracer = Tracer(bool(trace_path))
+metrics = Metrics()
+
+
+def traced(function):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        with tracer.span(function.__name__):
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+def record_report(seconds, status):
+    metrics.inc("weather_reports_total", status=status)
+    metrics.observe("weather_report_seconds", seconds)
+
+
+@contextmanager
+def measure_report(elapsed=0):
+    report, profile, start = {}, None, perf_counter() - elapsed
+    status = "failed"
+    if profile_dir and profile_lock.acquire(blocking=False):
+        from cProfile import Profile
+
+        profile = Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            profile = None
+            profile_lock.release()
+    if profile_dir and profile is None:
+        metrics.inc("weather_profiles_skipped_total")
+    try:
+        yield report
+        status = "ok"
+    finally:
+        record_report(perf_counter() - start, status)
+        if profile is not None:
+            profile.disable()
+            profile_lock.release()
+            os.makedirs(profile_dir, exist_ok=True)
+            name = report.get("file_name", f"report_{os.getpid()}")
+            profile.dump_stats(
+                os.path.join(profile_dir, f"{os.path.splitext(name)[0]}.prof")
+            )
+
+
+def output_pdf(pdf, file_name=None):
+    with tracer.span("pdf_output", file_name=file_name):
+        content = bytes(pdf.output())
+        if file_name:
+            with open(file_name, "wb") as file:
+                file.write(content)
+    metrics.observe("weather_pdf_bytes", len(content), buckets=Metrics.bytes_buckets)
+    return content
+
+
+class HttpClient:
+    def __init__(self, pool_size=None, retries=None):
+        self.pool_size = pool_size or max_workers
+        self.session = None
+        self.retries = max_retries if retries is None else retries
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "seconds": 0.0}
+        self.lock = Lock()
+
+    def get_session(self):
+        with self.lock:
+            if self.session is None and replay_dir:
+                self.session = FixtureSession(FixtureStore(replay_dir))
+            elif self.session is None:
+                from requests import Session
+                from requests.adapters import HTTPAdapter
+
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_size, pool_maxsize=self.pool_size
+                )
+                self.session = Session()
+                self.session.mount("https://", adapter)
+                self.session.mount("http://", adapter)
+        return self.session
+
+    def get(self, url):
+        from requests.exceptions import ConnectionError, Timeout
+
+        session = self.get_session()
+        for attempt in range(self.retries + 1):
+            start = perf_counter()
+            try:
+                with tracer.span(
+                    "http_get", path=urlparse(url).path, attempt=attempt
+                ) as span:
+                    response = session.get(url, timeout=(connect_timeout, read_timeout))
+                    span["status"] = response.status_code
+                    metrics.inc(
+                        "weather_http_bytes_total",
+                        len(response.content),
+                        host=urlparse(url).hostname,
+                    )
+            except (ConnectionError, Timeout):
+                self.record(start, failed=True)
+                if attempt == self.retries:
+                    raise
+                retry_after = None
+            else:
+                failed = response.status_code in retry_statuses
+                self.record(start, failed=failed)
+                if record_dir and not failed:
+                    fixture_recorder.put(
+                        url,
+                        response.status_code,
+                        response.headers.get("Content-Type", ""),
+                        response.content,
+                    )
+                if not failed or attempt == self.retries:
+                    return response
+                retry_after = response.headers.get("Retry-After")
+            with self.lock:
+                self.stats["retries"] += 1
+            metrics.inc("weather_http_retries_total")
+            sleep(self.backoff(attempt, retry_after))
+
+    def record(self, start, failed=False):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["seconds"] += perf_counter() - start
+            if failed:
+                self.stats["failures"] += 1
+        metrics.inc("weather_http_requests_total", failed=str(failed).lower())
+
+    @staticmethod
+    def backoff(attempt, retry_after=None):
+        if retry_after is not None and retry_after.isdigit():
+            return min(int(retry_after), backoff_cap)
+        return uniform(0, min(backoff_cap, backoff_base * 2**attempt))
+
+
+http_client = HttpClient()
+
+cache_dir = os.environ.get(
+    "WEATHER_CACHE_DIR", os.path.join(os.getcwd(), ".weather_cache")
+)
+cache_max_bytes = int(float(os.environ.get("WEATHER_CACHE_MAX_MB", 256)) * 1024 * 1024)
+cache_ttls = {
+    "history": None,
+    "forecast": int(os.environ.get("WEATHER_FORECAST_TTL", 3600)),
+    "current": int(os.environ.get("WEATHER_CURRENT_TTL", 600)),
+}
+
+
+class ResponseCache:
+    def __init__(self, path, max_bytes=None):
+        self.path = path
+        self.max_bytes = cache_max_bytes if max_bytes is None else max_bytes
+        self.lock = Lock()
+        self.initialized = False
+
+    @contextmanager
+    def connect(self):
+        if not self.initialized:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                if not self.initialized:
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS responses ("
+                        "key TEXT PRIMARY KEY, endpoint TEXT, location TEXT, date TEXT, "
+                        "body BLOB, size INTEGER, created REAL, accessed REAL, expires REAL)"
+                    )
+                    connection.execute(
+                        "CREATE INDEX IF NOT EXISTS responses_accessed "
+                        "ON responses (accessed)"
+                    )
+                    self.initialized = True
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def make_key(endpoint, location, date):
+        return f"{endpoint}|{normalize_location(location)}|{date}"
+
+    def get(self, endpoint, location, date):
+        key = self.make_key(endpoint, location, date)
+        with self.lock, self.connect() as connection:
+            row = connection.execute(
+                "SELECT body, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] < time():
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            connection.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (time(), key)
+            )
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, endpoint, location, date, response, ttl=None):
+        body = zlib.compress(json.dumps(response).encode())
+        now = time()
+        with self.lock, self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.make_key(endpoint, location, date),
+                    endpoint,
+                    normalize_location(location),
+                    date,
+                    body,
+                    len(body),
+                    now,
+                    now,
+                    None if ttl is None else now + ttl,
+                ),
+            )
+            self.evict(connection)
+
+    def evict(self, connection):
+        total = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        connection.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM (SELECT key, "
+            "SUM(size) OVER (ORDER BY accessed DESC, key DESC) AS newer "
+            "FROM responses) WHERE newer > ?)",
+            (self.max_bytes,),
+        )
+
+    def info(self):
+        with self.lock, self.connect() as connection:
+            rows = connection.execute(
+                "SELECT endpoint, COUNT(*), COALESCE(SUM(size), 0), "
+                "SUM(expires IS NOT NULL AND expires < ?) "
+                "FROM responses GROUP BY endpoint",
+                (time(),),
+            ).fetchall()
+        return {
+            endpoint: {"entries": entries, "bytes": size, "expired": expired}
+            for endpoint, entries, size, expired in rows
+        }
+
+    def purge(self, endpoint=None, expired_only=False):
+        query, parameters = "DELETE FROM responses WHERE 1 = 1", []
+        if endpoint:
+            query += " AND endpoint = ?"
+            parameters.append(endpoint)
+        if expired_only:
+            query += " AND expires IS NOT NULL AND expires < ?"
+            parameters.append(time())
+        with self.lock, self.connect() as connection:
+            return connection.execute(query, parameters).rowcount
+
+
+response_cache = ResponseCache(os.path.join(cache_dir, "responses.sqlite3"))
+
+queue_path = os.environ.get(
+    "WEATHER_QUEUE_PATH", os.path.join(cache_dir, "queue.sqlite3")
+)
+queue_lease = float(os.environ.get("WEATHER_QUEUE_LEASE", 300))
+queue_max_attempts = int(os.environ.get("WEATHER_QUEUE_ATTEMPTS", 3))
+
+
+class JobQueue:
+    def __init__(self, path, lease=None, max_attempts=None):
+        self.path = path
+        self.lease = queue_lease if lease is None else lease
+        self.max_attempts = max_attempts or queue_max_attempts
+        self.initialized = False
+
+    @contextmanager
+    def connect(self):
+        if not self.initialized:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            if not self.initialized:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS jobs ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, location TEXT, date TEXT, "
+                    "status TEXT, attempts INTEGER, worker TEXT, available REAL, "
+                    "result TEXT, error TEXT, created REAL, updated REAL)"
+                )
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available)"
+                )
+                self.initialized = True
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+    def enqueue(self, place, dates):
+        now = time()
+        with self.connect() as connection:
+            connection.executemany(
+                "INSERT INTO jobs (location, date, status, attempts, available, "
+                "created, updated) VALUES (?, ?, 'queued', 0, ?, ?, ?)",
+                [(place, str(date), now, now, now) for date in dates],
+            )
+        return len(dates)
+
+    def claim(self, worker):
+        now = time()
+        with self.connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Lease expired', "
+                "updated = ? WHERE status = 'running' AND available <= ? "
+                "AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = connection.execute(
+                "SELECT id, location, date FROM jobs "
+                "WHERE status IN ('queued', 'running') AND available <= ? "
+                "ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, "
+                    "worker = ?, available = ?, updated = ? WHERE id = ?",
+                    (worker, now + self.lease, now, row[0]),
+                )
+        return row
+
+    def renew(self, job_id, worker):
+        now = time()
+        with self.connect() as connection:
+            return (
+                connection.execute(
+                    "UPDATE jobs SET available = ?, updated = ? "
+                    "WHERE id = ? AND worker = ? AND status = 'running'",
+                    (now + self.lease, now, job_id, worker),
+                ).rowcount
+                == 1
+            )
+
+    def complete(self, job_id, worker, result):
+        with self.connect() as connection:
+            return (
+                connection.execute(
+                    "UPDATE jobs SET status = 'done', result = ?, error = NULL, "
+                    "updated = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                    (result, time(), job_id, worker),
+                ).rowcount
+                == 1
+            )
+
+    def fail(self, job_id, worker, error):
+        with self.connect() as connection:
+            attempts = connection.execute(
+                "SELECT attempts FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()[0]
+            now = time()
+            return (
+                connection.execute(
+                    "UPDATE jobs SET status = ?, error = ?, available = ?, updated = ? "
+                    "WHERE id = ? AND worker = ? AND status = 'running'",
+                    (
+                        "failed" if attempts >= self.max_attempts else "queued",
+                        error,
+                        now + HttpClient.backoff(attempts),
+                        now,
+                        job_id,
+                        worker,
+                    ),
+                ).rowcount
+                == 1
+            )
+
+    def next_available(self):
+        with self.connect() as connection:
+            available = connection.execute(
+                "SELECT MIN(available) FROM jobs WHERE status = 'queued'"
+            ).fetchone()[0]
+        return None if available is None else max(0, available - time())
+
+    def info(self):
+        with self.connect() as connection:
+            return dict(
+                connection.execute(
+                    "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+                ).fetchall()
+            )
+
+
+job_queue = JobQueue(queue_path)
+
+archive_path = os.environ.get(
+    "WEATHER_ARCHIVE_PATH", os.path.join(cache_dir, "archive.sqlite3")
+)
+archive_enabled = os.environ.get("WEATHER_ARCHIVE", "1") == "1"
+
+
+class ObservationArchive:
+    def __init__(self, path):
+        self.path = path
+        self.lock = Lock()
+        self.initialized = False
+
+    @contextmanager
+    def connect(self):
+        if not self.initialized:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                if not self.initialized:
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS days (location TEXT, "
+                        "name TEXT, country TEXT, date TEXT, kind TEXT, summary TEXT, "
+                        "updated REAL, PRIMARY KEY (location, date)) WITHOUT ROWID"
+                    )
+                    columns = ", ".join(
+                        f"{field} {'TEXT' if field in text_fields else 'REAL'}"
+                        for field in hourly_fields
+                    )
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS hours (location TEXT, date TEXT, "
+                        f"hour INTEGER, {columns}, "
+                        "PRIMARY KEY (location, date, hour)) WITHOUT ROWID"
+                    )
+                    self.initialized = True
+                yield connection
+        finally:
+            connection.close()
+
+    def store(self, days, kind):
+        fields = list(hourly_fields)
+        now = time()
+        with self.lock, self.connect() as connection:
+            for day in days:
+                location = self.key(day)
+                existing = connection.execute(
+                    "SELECT kind FROM days WHERE location = ? AND date = ?",
+                    (location, day.date),
+                ).fetchone()
+                if kind == "forecast" and existing and existing[0] == "historical":
+                    continue
+                summary = {
+                    attr: value for attr, value in day.display() if attr != "hourly"
+                }
+                connection.execute(
+                    "INSERT OR REPLACE INTO days VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        location,
+                        normalize_location(day.name),
+                        normalize_location(day.country),
+                        day.date,
+                        kind,
+                        json.dumps(summary),
+                        now,
+                    ),
+                )
+                hourly = day.hourly
+                columns = [
+                    (
+                        hourly[field].tolist()
+                        if field in hourly
+                        else [None] * len(hourly.hour)
+                    )
+                    for field in fields
+                ]
+                connection.executemany(
+                    f"INSERT OR REPLACE INTO hours VALUES ({', '.join('?' * (len(fields) + 3))})",
+                    [
+                        (location, day.date, hour, *values)
+                        for hour, *values in zip(hourly.hour.tolist(), *columns)
+                    ],
+                )
+
+    @staticmethod
+    def key(day):
+        return (
+            f"{normalize_location(day.name)}, {normalize_location(day.country)} "
+            f"({float(day.latitude):.2f}, {float(day.longitude):.2f})"
+        )
+
+    def resolve(self, connection, location):
+        location = normalize_location(location)
+        if connection.execute(
+            "SELECT 1 FROM days WHERE location = ? LIMIT 1", (location,)
+        ).fetchone():
+            return location
+        name, _, country = (part.strip() for part in location.partition(","))
+        matches = [
+            row[0]
+            for row in connection.execute(
+                "SELECT DISTINCT location FROM days "
+                "WHERE name = ? AND (? = '' OR country = ?) ORDER BY location",
+                (name, country, country),
+            )
+        ]
+        if len(matches) > 1:
+            raise ValueError(
+                f"Several archived locations match {location}: {'; '.join(matches)}"
+            )
+        return matches[0] if matches else location
+
+    def query(self, location, start, end, fields=None):
+        from numpy import array
+
+        fields = list(fields or hourly_fields)
+        if unknown := [field for field in fields if field not in hourly_fields]:
+            raise ValueError(f"Unknown hourly fields: {', '.join(unknown)}")
+        with self.lock, self.connect() as connection:
+            rows = connection.execute(
+                f"SELECT date, hour, {', '.join(fields)} FROM hours "
+                "WHERE location = ? AND date BETWEEN ? AND ? ORDER BY date, hour",
+                (self.resolve(connection, location), str(start), str(end)),
+            ).fetchall()
+        columns = list(zip(*rows)) or [()] * (len(fields) + 2)
+        return {
+            name: array(
+                values,
+                dtype=(
+                    object
+                    if name in text_fields or name == "date"
+                    else int if name == "hour" else float
+                ),
+            )
+            for name, values in zip(["date", "hour", *fields], columns)
+        }
+
+    def load_days(self, location, start, end):
+        with self.lock, self.connect() as connection:
+            location = self.resolve(connection, location)
+            rows = connection.execute(
+                "SELECT date, kind, summary FROM days "
+                "WHERE location = ? AND date BETWEEN ? AND ? ORDER BY date",
+                (location, str(start), str(end)),
+            ).fetchall()
+        hours = self.query(location, start, end)
+        days = {}
+        for date, kind, summary in rows:
+            summary = json.loads(summary)
+            cls = ForecastDay if "aqi_index" in summary else HistoricalDay
+            selected = hours["date"] == date
+            hourly = HourlyBlock(
+                **{
+                    name: hours[name][selected]
+                    for name in hours
+                    if name != "date" and (cls is ForecastDay or name != "aqi_index")
+                }
+            )
+            days[date] = cls(**summary, hourly=hourly)
+        return days
+
+    def describe(self, location):
+        with self.lock, self.connect() as connection:
+            row = connection.execute(
+                "SELECT summary FROM days WHERE location = ? "
+                "ORDER BY date DESC LIMIT 1",
+                (self.resolve(connection, location),),
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def info(self):
+        with self.lock, self.connect() as connection:
+            return connection.execute(
+                "SELECT location, COUNT(*), MIN(date), MAX(date), "
+                "SUM(kind = 'historical') FROM days GROUP BY location ORDER BY location"
+            ).fetchall()
+
+
+observation_archive = ObservationArchive(archive_path)
+
+trend_window = int(os.environ.get("WEATHER_TREND_WINDOW", 7))
+trend_max_points = int(os.environ.get("WEATHER_TREND_MAX_POINTS", 240))
+trend_fields = (
+    "temp_c",
+    "precip_mm",
+    "snow_cm",
+    "humidity_percentage",
+    "pressure_mb",
+    "wind_kph",
+    "gust_kph",
+)
+
+
+class FixtureStore:
+    def __init__(self, directory, latency=None, error_rate=None):
+        self.directory = directory
+        self.latency = mock_latency if latency is None else latency
+        self.error_rate = mock_error_rate if error_rate is None else error_rate
+        self.lock = Lock()
+        self.index = None
+        self.parsed = {}
+
+    @staticmethod
+    def make_key(url):
+        url = urlparse(url)
+        query = sorted(
+            (name, normalize_location(value) if name == "q" else value)
+            for name, value in parse_qsl(url.query)
+            if name != "key"
+        )
+        return url.path + (
+            "?" + "&".join(f"{n}={v}" for n, v in query) if query else ""
+        )
+
+    def load_index(self):
+        if self.index is None:
+            try:
+                with open(os.path.join(self.directory, "index.json")) as file:
+                    self.index = json.load(file)
+            except FileNotFoundError:
+                self.index = {}
+        return self.index
+
+    def get(self, url):
+        with self.lock:
+            entry = self.load_index().get(self.make_key(url))
+        if entry is None:
+            return None
+        with open(os.path.join(self.directory, entry["file"]), "rb") as file:
+            return entry["status"], entry["content_type"], file.read()
+
+    def responses(self):
+        with self.lock:
+            index = dict(self.load_index())
+        for key in sorted(index):
+            if index[key]["status"] == 200 and urlparse(key).path.endswith(".json"):
+                if key not in self.parsed:
+                    with open(os.path.join(self.directory, index[key]["file"])) as file:
+                        self.parsed[key] = json.load(file)
+                yield key, self.parsed[key]
+
+    def get_covering(self, url):
+        url = urlparse(url)
+        query = dict(parse_qsl(url.query))
+        for key, response in self.responses():
+            recorded = urlparse(key)
+            if recorded.path != url.path or dict(parse_qsl(recorded.query)).get(
+                "q"
+            ) != normalize_location(query.get("q", "")):
+                continue
+            days = response.get("forecast", {}).get("forecastday", [])
+            if url.path.endswith("/forecast.json") and query.get("days", "").isdigit():
+                days = days[: int(query["days"])]
+                complete = len(days) == int(query["days"])
+            elif "dt" in query:
+                start, end = query["dt"], query.get("end_dt", query["dt"])
+                days = [day for day in days if start <= day["date"] <= end]
+                complete = (
+                    len(days)
+                    == (
+                        datetime.date.fromisoformat(end)
+                        - datetime.date.fromisoformat(start)
+                    ).days
+                    + 1
+                )
+            else:
+                complete = False
+            if complete:
+                response = {
+                    **response,
+                    "forecast": {**response["forecast"], "forecastday": days},
+                }
+                return 200, "application/json", json.dumps(response).encode()
+        return None
+
+    def put(self, url, status, content_type, content):
+        key = self.make_key(url)
+        extension = os.path.splitext(urlparse(url).path)[1]
+        file_name = hashlib.sha1(key.encode()).hexdigest()[:16] + extension
+        with self.lock:
+            index = self.load_index()
+            os.makedirs(self.directory, exist_ok=True)
+            self.write(file_name, content)
+            index[key] = {
+                "file": file_name,
+                "status": status,
+                "content_type": content_type,
+            }
+            self.write(
+                "index.json", json.dumps(index, indent=4, sort_keys=True).encode()
+            )
 
+    def write(self, file_name, content):
+        path = os.path.join(self.directory, file_name)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(content)
+        os.replace(temporary_path, path)
+
+    def respond(self, url):
+        if self.latency:
+            sleep(uniform(0.5, 1.5) * self.latency)
+        if self.error_rate and uniform(0, 1) < self.error_rate:
+            return (
+                503,
+                "application/json",
+                b'{"error": {"code": 9999, "message": "Injected error"}}',
+            )
+        fixture = self.get(url) or self.get_covering(url)
+        if fixture is None:
+            message = {
+                "error": {
+                    "code": 1006,
+                    "message": "No fixture recorded for this request.",
+                }
+            }
+            return 400, "application/json", json.dumps(message).encode()
+        return fixture
+
+
+class FixtureSession:
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, url, timeout=None):
+        from requests import Response
+
+        response = Response()
+        response.url = url
+        response.status_code, content_type, response._content = self.store.respond(url)
+        response.headers["Content-Type"] = content_type
+        return response
+
+
+fixture_recorder = FixtureStore(record_dir or "fixtures", latency=0, error_rate=0)
+
+progress_mode = os.environ.get("WEATHER_PROGRESS", "auto")
+icon_memory_size = int(os.environ.get("WEATHER_ICON_MEMORY_SIZE", 128))
+icon_pack_dir = os.environ.get(
+    "WEATHER_ICON_PACK", os.path.join(os.getcwd(), "icon_pack")
+)
+offline_icons = os.environ.get("WEATHER_OFFLINE_ICONS", "0") == "1"
+icon_codes = (
+    113, 116, 119, 122, 143, 176, 179, 182, 185, 200, 227, 230, 248, 260, 263, 266,
+    281, 284, 293, 296, 299, 302, 305, 308, 311, 314, 317, 320, 323, 326, 329, 332,
+    335, 338, 350, 353, 356, 359, 362, 365, 368, 371, 374, 377, 386, 389, 392, 395,
+)  # fmt: skip
+
+
+class IconStore:
+    def __init__(self, directory, capacity=None, offline=False):
+        self.directory = directory
+        self.offline = offline
+        self.capacity = icon_memory_size if capacity is None else capacity
+        self.images = OrderedDict()
+        self.digests = {}
+        self.lock = Lock()
+
+    def path(self, link):
+        parts = [part for part in urlparse(link).path.split("/") if part]
+        if not parts or any(part in (".", "..") for part in parts):
+            raise ValueError(f"Invalid icon link {link}")
+        return os.path.join(self.directory, "refs", *parts)
+
+    def object_path(self, digest):
+        return os.path.join(self.directory, "objects", f"{digest}.png")
+
+    def has(self, link):
+        return os.path.exists(self.path(link))
+
+    def remember(self, digest, image):
+        with self.lock:
+            self.images[digest] = image
+            self.images.move_to_end(digest)
+            while len(self.images) > self.capacity:
+                self.images.popitem(last=False)
+        return image
+
+    def load(self, link):
+        with self.lock:
+            digest = self.digests.get(link)
+            if digest in self.images:
+                self.images.move_to_end(digest)
+                return self.images[digest]
+        if record_dir and not self.offline:
+            return None
+        try:
+            with open(self.path(link)) as file:
+                digest = file.read().strip()
+            with open(self.object_path(digest), "rb") as file:
+                content = file.read()
+        except FileNotFoundError:
+            return None
+        if hashlib.sha1(content).hexdigest() != digest:
+            return None
+        with self.lock:
+            self.digests[link] = digest
+            if digest in self.images:
+                return self.images[digest]
+        return self.remember(digest, self.decode(content))
+
+    def save(self, link, content):
+        digest = hashlib.sha1(content).hexdigest()
+        for path, data in (
+            (self.object_path(digest), content),
+            (self.path(link), digest.encode()),
+        ):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary_path = f"{path}.{os.getpid()}.{get_ident()}.tmp"
+            with open(temporary_path, "wb") as file:
+                file.write(data)
+            os.replace(temporary_path, path)
+        with self.lock:
+            self.digests[link] = digest
+        return digest
+
+    def fetch(self, links):
+        images = {link: self.load(link) for link in dict.fromkeys(links)}
+        missing = [link for link in images if images[link] is None]
+        metrics.inc(
+            "weather_icon_requests_total", len(images) - len(missing), result="hit"
+        )
+        metrics.inc("weather_icon_requests_total", len(missing), result="miss")
+        if missing and self.offline:
+            raise FileNotFoundError(
+                f"{len(missing)} condition icons missing from the icon pack at "
+                f"{self.directory}, run: python project.py --warm-icons"
+            )
+        metrics.inc("weather_icon_fetches_total", len(missing))
+        with tracer.span("fetch_icons", count=len(missing)):
+            responses = fetch_all([icon_url(link) for link in missing])
+        for link, response in zip(missing, responses):
+            response.raise_for_status()
+            digest = self.save(link, response.content)
+            with self.lock:
+                images[link] = self.images.get(digest)
+            if images[link] is None:
+                images[link] = self.remember(digest, self.decode(response.content))
+        return images
 
-API_KEY = rf"{open("key.txt", "r").read().strip('\n').strip()}"
+    @staticmethod
+    def decode(content):
+        from PIL import Image
+
+        image = Image.open(BytesIO(content))
+        image.load()
+        return image
+
+
+if offline_icons:
+    icon_store = IconStore(icon_pack_dir, offline=True)
+else:
+    icon_store = IconStore(os.path.join(cache_dir, "icons"))
+
+
+hourly_fields = {
+    "temp_c": ("temp_c",),
+    "temp_f": ("temp_f",),
+    "is_day": ("is_day",),
+    "condition_text": ("condition", "text"),
+    "condition_image": ("condition", "icon"),
+    "wind_mph": ("wind_mph",),
+    "wind_kph": ("wind_kph",),
+    "wind_dir": ("wind_dir",),
+    "pressure_mb": ("pressure_mb",),
+    "precip_mm": ("precip_mm",),
+    "snow_cm": ("snow_cm",),
+    "humidity_percentage": ("humidity",),
+    "cloud_cover_percentage": ("cloud",),
+    "dewpoint_c": ("dewpoint_c",),
+    "dewpoint_f": ("dewpoint_f",),
+    "chance_of_rain": ("chance_of_rain",),
+    "chance_of_snow": ("chance_of_snow",),
+    "vis_km": ("vis_km",),
+    "vis_miles": ("vis_miles",),
+    "uv": ("uv",),
+    "gust_kph": ("gust_kph",),
+    "gust_mph": ("gust_mph",),
+    "aqi_index": ("air_quality", "gb-defra-index"),
+}
+text_fields = ("condition_text", "condition_image", "wind_dir")
+
+
+air_quality_fields = ("aqi_index", "co", "o3", "no2", "so2", "pm2_5", "pm_10")
 
 
 class Day:
+    __slots__ = (
+        "date",
+        "name",
+        "country",
+        "latitude",
+        "longitude",
+        "localtime",
+        "temp_c",
+        "temp_f",
+        "condition_text",
+        "condition_image",
+        "wind_mph",
+        "wind_kph",
+        "gust_kph",
+        "gust_mph",
+        "precip_mm",
+        "pressure_mb",
+        "snow_cm",
+        "humidity_percentage",
+        "cloud_cover_percentage",
+        "dewpoint_c",
+        "dewpoint_f",
+        "vis_km",
+        "vis_miles",
+        "uv",
+        "astro",
+    )
+
     def __init__(self, date, **kwargs):
         self.date = date
         for kwarg in kwargs:
             setattr(self, kwarg, kwargs[kwarg])
 
     def display(self):
-        for attr in self.__dict__:
-            yield (attr, self.__dict__[attr])
+        for cls in reversed(type(self).__mro__):
+            for attr in getattr(cls, "__slots__", ()):
+                if hasattr(self, attr):
+                    yield (attr, getattr(self, attr))
 
     @classmethod
-    def generate_current_report(cls, response):
+    def generate_current_report(cls, response, days=None):
         try:
             snowfall = response["currrent"]["snow_cm"]
         except KeyError:
             snowfall = 0.0
+        if days is None:
+            days = cls.index_days(response)
         astro_info = {}
-        for forecast_day in response["forecast"]["forecastday"]:
-            if forecast_day["date"] == Day.get_date(
-                response["current"]["last_updated"]
-            ):
-                astro_info["sun_rise"] = forecast_day["astro"]["sunrise"]
-                astro_info["sun_set"] = forecast_day["astro"]["sunset"]
-                astro_info["moon_rise"] = forecast_day["astro"]["moonrise"]
-                astro_info["moon_set"] = forecast_day["astro"]["moonset"]
-                astro_info["moon_phase"] = forecast_day["astro"]["moon_phase"]
-                astro_info["moon_illumination"] = forecast_day["astro"][
-                    "moon_illumination"
-                ]
-        return cls(
+        if (date := Day.get_date(response["current"]["last_updated"])) in days:
+            astro_info = days[date].astro
+        return CurrentDay(
             date=Day.get_date(response["current"]["last_updated"]),
             name=response["location"]["name"],
             country=response["location"]["country"],
@@ -107,197 +1183,97 @@ class Day:
 
     @classmethod
     def generate_forecast_for_day(cls, date, response):
-        astro_info = {}
-        for forecast_day in response["forecast"]["forecastday"]:
-            if forecast_day["date"] == Day.get_date(date):
-                astro_info["sun_rise"] = forecast_day["astro"]["sunrise"]
-                astro_info["sun_set"] = forecast_day["astro"]["sunset"]
-                astro_info["moon_rise"] = forecast_day["astro"]["moonrise"]
-                astro_info["moon_set"] = forecast_day["astro"]["moonset"]
-                astro_info["moon_phase"] = forecast_day["astro"]["moon_phase"]
-                astro_info["moon_illumination"] = forecast_day["astro"][
-                    "moon_illumination"
-                ]
-        hour_reports = {}
-        for forecast_day in response["forecast"]["forecastday"]:
-            if forecast_day["date"] == date:
-                for hour in forecast_day["hour"]:
-                    hour_reports[Day.get_hour(hour["time"])] = {
-                        "temp_c": hour["temp_c"],
-                        "temp_f": hour["temp_f"],
-                        "is_day": hour["is_day"],
-                        "condition_text": hour["condition"]["text"].strip(),
-                        "condition_image": hour["condition"]["icon"],
-                        "wind_mph": hour["wind_mph"],
-                        "wind_kph": hour["wind_kph"],
-                        "wind_dir": hour["wind_dir"],
-                        "pressure_mb": hour["pressure_mb"],
-                        "precip_mm": hour["precip_mm"],
-                        "snow_cm": hour["snow_cm"],
-                        "humidity_percentage": hour["humidity"],
-                        "cloud_cover_percentage": hour["cloud"],
-                        "dewpoint_c": hour["dewpoint_c"],
-                        "dewpoint_f": hour["dewpoint_f"],
-                        "chance_of_rain": hour["chance_of_rain"],
-                        "chance_of_snow": hour["chance_of_snow"],
-                        "vis_km": hour["vis_km"],
-                        "vis_miles": hour["vis_miles"],
-                        "uv": hour["uv"],
-                        "gust_kph": hour["gust_kph"],
-                        "gust_mph": hour["gust_mph"],
-                        "aqi_index": hour["air_quality"]["gb-defra-index"],
-                    }
-        (
-            gust_kph_max,
-            gust_mph_max,
-            pressure_avg,
-            cloud_cover_avg,
-            dewpoint_c_avg,
-            dewpoint_f_avg,
-        ) = (0, 0, 0, 0, 0, 0)
-        for hour in hour_reports:
-            if hour_reports[hour]["gust_kph"] > gust_kph_max:
-                gust_kph_max = hour_reports[hour]["gust_kph"]
-            if hour_reports[hour]["gust_mph"] > gust_mph_max:
-                gust_mph_max = hour_reports[hour]["gust_mph"]
-            pressure_avg += hour_reports[hour]["pressure_mb"]
-            cloud_cover_avg += hour_reports[hour]["cloud_cover_percentage"]
-            dewpoint_c_avg += hour_reports[hour]["dewpoint_c"]
-            dewpoint_f_avg += hour_reports[hour]["dewpoint_f"]
-        pressure_avg = round(pressure_avg / 24, 2)
-        cloud_cover_avg = round(cloud_cover_avg / 24, 2)
-        dewpoint_c_avg = round(dewpoint_c_avg / 24, 2)
-        dewpoint_f_avg = round(dewpoint_f_avg / 24, 2)
-        for forecast_day in response["forecast"]["forecastday"]:
-            if forecast_day["date"] == date:
-                return cls(
-                    date=forecast_day["date"],
-                    name=response["location"]["name"],
-                    country=response["location"]["country"],
-                    latitude=response["location"]["lat"],
-                    longitude=response["location"]["lon"],
-                    localtime=response["location"]["localtime"],
-                    temp_c=forecast_day["day"]["avgtemp_c"],
-                    temp_f=forecast_day["day"]["avgtemp_f"],
-                    condition_text=forecast_day["day"]["condition"]["text"],
-                    condition_image=forecast_day["day"]["condition"]["icon"],
-                    wind_mph=forecast_day["day"]["maxwind_mph"],
-                    wind_kph=forecast_day["day"]["maxwind_kph"],
-                    gust_kph=gust_kph_max,
-                    gust_mph=gust_mph_max,
-                    precip_mm=forecast_day["day"]["totalprecip_mm"],
-                    pressure_mb=pressure_avg,
-                    snow_cm=forecast_day["day"]["totalsnow_cm"],
-                    humidity_percentage=forecast_day["day"]["avghumidity"],
-                    cloud_cover_percentage=cloud_cover_avg,
-                    dewpoint_c=dewpoint_c_avg,
-                    dewpoint_f=dewpoint_f_avg,
-                    vis_km=forecast_day["day"]["avgvis_km"],
-                    vis_miles=forecast_day["day"]["avgvis_miles"],
-                    uv=forecast_day["day"]["uv"],
-                    aqi_index=forecast_day["day"]["air_quality"]["gb-defra-index"],
-                    co=round(forecast_day["day"]["air_quality"]["co"], 2),
-                    o3=round(forecast_day["day"]["air_quality"]["o3"], 2),
-                    no2=round(forecast_day["day"]["air_quality"]["no2"], 2),
-                    so2=round(forecast_day["day"]["air_quality"]["so2"], 2),
-                    pm2_5=round(forecast_day["day"]["air_quality"]["pm2_5"], 2),
-                    pm_10=round(forecast_day["day"]["air_quality"]["pm10"], 2),
-                    astro=astro_info,
-                    hourly_reports=hour_reports,
-                )
+        return cls.index_days(response).get(date)
 
     @classmethod
     def generate_historical_for_day(cls, date, response):
-        astro_info = {}
-        for forecast_day in response["forecast"]["forecastday"]:
-            if forecast_day["date"] == Day.get_date(date):
-                astro_info["sun_rise"] = forecast_day["astro"]["sunrise"]
-                astro_info["sun_set"] = forecast_day["astro"]["sunset"]
-                astro_info["moon_rise"] = forecast_day["astro"]["moonrise"]
-                astro_info["moon_set"] = forecast_day["astro"]["moonset"]
-                astro_info["moon_phase"] = forecast_day["astro"]["moon_phase"]
-                astro_info["moon_illumination"] = forecast_day["astro"][
-                    "moon_illumination"
-                ]
-        hour_reports = {}
-        for forecast_day in response["forecast"]["forecastday"]:
-            if forecast_day["date"] == date:
-                for hour in forecast_day["hour"]:
-                    hour_reports[Day.get_hour(hour["time"])] = {
-                        "temp_c": hour["temp_c"],
-                        "temp_f": hour["temp_f"],
-                        "is_day": hour["is_day"],
-                        "condition_text": hour["condition"]["text"].strip(),
-                        "condition_image": hour["condition"]["icon"],
-                        "wind_mph": hour["wind_mph"],
-                        "wind_kph": hour["wind_kph"],
-                        "wind_dir": hour["wind_dir"],
-                        "pressure_mb": hour["pressure_mb"],
-                        "precip_mm": hour["precip_mm"],
-                        "snow_cm": hour["snow_cm"],
-                        "humidity_percentage": hour["humidity"],
-                        "cloud_cover_percentage": hour["cloud"],
-                        "dewpoint_c": hour["dewpoint_c"],
-                        "dewpoint_f": hour["dewpoint_f"],
-                        "chance_of_rain": hour["chance_of_rain"],
-                        "chance_of_snow": hour["chance_of_snow"],
-                        "vis_km": hour["vis_km"],
-                        "vis_miles": hour["vis_miles"],
-                        "uv": hour["uv"],
-                        "gust_kph": hour["gust_kph"],
-                        "gust_mph": hour["gust_mph"],
-                    }
-        (
-            gust_kph_max,
-            gust_mph_max,
-            pressure_avg,
-            cloud_cover_avg,
-            dewpoint_c_avg,
-            dewpoint_f_avg,
-        ) = (0, 0, 0, 0, 0, 0)
-        for hour in hour_reports:
-            if hour_reports[hour]["gust_kph"] > gust_kph_max:
-                gust_kph_max = hour_reports[hour]["gust_kph"]
-            if hour_reports[hour]["gust_mph"] > gust_mph_max:
-                gust_mph_max = hour_reports[hour]["gust_mph"]
-            pressure_avg += hour_reports[hour]["pressure_mb"]
-            cloud_cover_avg += hour_reports[hour]["cloud_cover_percentage"]
-            dewpoint_c_avg += hour_reports[hour]["dewpoint_c"]
-            dewpoint_f_avg += hour_reports[hour]["dewpoint_f"]
-        pressure_avg = round(pressure_avg / 24, 2)
-        cloud_cover_avg = round(cloud_cover_avg / 24, 2)
-        dewpoint_c_avg = round(dewpoint_c_avg / 24, 2)
-        dewpoint_f_avg = round(dewpoint_f_avg / 24, 2)
-        for forecast_day in response["forecast"]["forecastday"]:
-            if forecast_day["date"] == date:
-                return cls(
-                    date=forecast_day["date"],
-                    name=response["location"]["name"],
-                    country=response["location"]["country"],
-                    latitude=response["location"]["lat"],
-                    longitude=response["location"]["lon"],
-                    localtime=response["location"]["localtime"],
-                    temp_c=forecast_day["day"]["avgtemp_c"],
-                    temp_f=forecast_day["day"]["avgtemp_f"],
-                    condition_text=forecast_day["day"]["condition"]["text"],
-                    condition_image=forecast_day["day"]["condition"]["icon"],
-                    wind_mph=forecast_day["day"]["maxwind_mph"],
-                    wind_kph=forecast_day["day"]["maxwind_kph"],
-                    gust_kph=gust_kph_max,
-                    gust_mph=gust_mph_max,
-                    precip_mm=forecast_day["day"]["totalprecip_mm"],
-                    pressure_mb=pressure_avg,
-                    snow_cm=forecast_day["day"]["totalsnow_cm"],
-                    humidity_percentage=forecast_day["day"]["avghumidity"],
-                    cloud_cover_percentage=cloud_cover_avg,
-                    dewpoint_c=dewpoint_c_avg,
-                    dewpoint_f=dewpoint_f_avg,
-                    vis_km=forecast_day["day"]["avgvis_km"],
-                    vis_miles=forecast_day["day"]["avgvis_miles"],
-                    uv=forecast_day["day"]["uv"],
-                    astro=astro_info,
-                    hourly_reports=hour_reports,
-                )
+        return cls.index_days(response, aqi=False).get(date)
+
+    @classmethod
+    @traced
+    def index_days(cls, response, aqi=True):
+        return {
+            forecast_day["date"]: cls.from_forecast_day(
+                forecast_day, response["location"], aqi=aqi
+            )
+            for forecast_day in response["forecast"]["forecastday"]
+        }
+
+    @classmethod
+    def from_forecast_day(cls, forecast_day, location, aqi=True):
+        hourly = Day.parse_hourly(forecast_day["hour"], aqi=aqi)
+        day = forecast_day["day"]
+        if aqi:
+            air_quality = {
+                "aqi_index": day["air_quality"]["gb-defra-index"],
+                "co": round(day["air_quality"]["co"], 2),
+                "o3": round(day["air_quality"]["o3"], 2),
+                "no2": round(day["air_quality"]["no2"], 2),
+                "so2": round(day["air_quality"]["so2"], 2),
+                "pm2_5": round(day["air_quality"]["pm2_5"], 2),
+                "pm_10": round(day["air_quality"]["pm10"], 2),
+            }
+            cls = ForecastDay
+        else:
+            air_quality = {}
+            cls = HistoricalDay
+        return cls(
+            date=forecast_day["date"],
+            name=location["name"],
+            country=location["country"],
+            latitude=location["lat"],
+            longitude=location["lon"],
+            localtime=location["localtime"],
+            temp_c=day["avgtemp_c"],
+            temp_f=day["avgtemp_f"],
+            condition_text=day["condition"]["text"],
+            condition_image=day["condition"]["icon"],
+            wind_mph=day["maxwind_mph"],
+            wind_kph=day["maxwind_kph"],
+            gust_kph=max(0, hourly["gust_kph"].max().item()),
+            gust_mph=max(0, hourly["gust_mph"].max().item()),
+            precip_mm=day["totalprecip_mm"],
+            pressure_mb=round(hourly["pressure_mb"].mean().item(), 2),
+            snow_cm=day["totalsnow_cm"],
+            humidity_percentage=day["avghumidity"],
+            cloud_cover_percentage=round(
+                hourly["cloud_cover_percentage"].mean().item(), 2
+            ),
+            dewpoint_c=round(hourly["dewpoint_c"].mean().item(), 2),
+            dewpoint_f=round(hourly["dewpoint_f"].mean().item(), 2),
+            vis_km=day["avgvis_km"],
+            vis_miles=day["avgvis_miles"],
+            uv=day["uv"],
+            **air_quality,
+            astro={
+                "sun_rise": forecast_day["astro"]["sunrise"],
+                "sun_set": forecast_day["astro"]["sunset"],
+                "moon_rise": forecast_day["astro"]["moonrise"],
+                "moon_set": forecast_day["astro"]["moonset"],
+                "moon_phase": forecast_day["astro"]["moon_phase"],
+                "moon_illumination": forecast_day["astro"]["moon_illumination"],
+            },
+            hourly=hourly,
+        )
+
+    @staticmethod
+    def parse_hourly(hours, aqi=True):
+        from numpy import array
+
+        fields = [field for field in hourly_fields if aqi or field != "aqi_index"]
+        columns = {field: [] for field in ["hour", *fields]}
+        for hour in hours:
+            columns["hour"].append(Day.get_hour(hour["time"]))
+            for field in fields:
+                value = hour
+                for key in hourly_fields[field]:
+                    value = value[key]
+                columns[field].append(value)
+        for field in text_fields:
+            columns[field] = array(
+                [sys.intern(value.strip()) for value in columns[field]], dtype=object
+            )
+        return HourlyBlock(**columns)
 
     @staticmethod
     def get_date(string):
@@ -312,7 +1288,66 @@ class Day:
         return None
 
 
+class CurrentDay(Day):
+    __slots__ = (
+        "last_updated",
+        "wind_dir",
+        "feelslike_c",
+        "feelslike_f",
+        "windchill_c",
+        "windchill_f",
+        "heatindex_c",
+        "heatindex_f",
+        *air_quality_fields,
+    )
+
+
+class HistoricalDay(Day):
+    __slots__ = ("hourly",)
+
+
+class ForecastDay(HistoricalDay):
+    __slots__ = air_quality_fields
+
+
+class HourlyBlock:
+    __slots__ = ("hour", *hourly_fields)
+
+    def __init__(self, **columns):
+        from numpy import array
+
+        for column in columns:
+            setattr(self, column, array(columns[column]))
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def __contains__(self, field):
+        return field in self.__slots__ and hasattr(self, field)
+
+    def __iter__(self):
+        return (field for field in self.__slots__ if hasattr(self, field))
+
+
 def main():
+    try:
+        run_main()
+    except MissingApiKeyError as error:
+        sys.exit(colored(str(error), "red"))
+    finally:
+        if tracer.enabled:
+            tracer.export()
+        if metrics_path:
+            metrics.write()
+
+
+def run_main():
+    if len(sys.argv) > 1 and sys.argv[1].startswith("-"):
+        run_command(sys.argv[1:])
+        return
     if len(sys.argv) < 2:
         place = input("Location: ").strip()
         start_date = input("Start Date: ").strip().lower()
@@ -332,13 +1367,811 @@ def main():
     prompt_parse_and_run(place, start_date, end_date)
 
 
+def run_command(args):
+    command, *arguments = args
+    if command in ("-h", "--help"):
+        print(usage)
+    elif command == "--cache-info":
+        info = response_cache.info()
+        if not info:
+            print(colored("Response cache is empty.", "green"))
+        for endpoint in info:
+            print(
+                colored(
+                    f"{endpoint}: {info[endpoint]['entries']} entries, "
+                    f"{round(info[endpoint]['bytes'] / 1024, 1)} KiB, "
+                    f"{info[endpoint]['expired']} expired",
+                    "green",
+                )
+            )
+    elif command == "--cache-purge":
+        expired_only = "--expired" in arguments
+        arguments = [argument for argument in arguments if argument != "--expired"]
+        removed = response_cache.purge(
+            arguments[0] if arguments else None, expired_only=expired_only
+        )
+        print(colored(f"Removed {removed} cached responses.", "green"))
+    elif command == "--warm-icons":
+        progress.start("Downloading condition icons")
+        total, downloaded = warm_icon_pack(arguments[0] if arguments else None)
+        progress.done(
+            f"Icon pack ready ({downloaded} downloaded, {total} total) :package:"
+        )
+    elif command == "--batch":
+        if not arguments:
+            sys.exit(colored(usage, "red"))
+        use_background_progress()
+        summary = run_batch(read_manifest(arguments[0]))
+        summary_path = arguments[1] if len(arguments) > 1 else "batch_summary.json"
+        with open(summary_path, "w") as file:
+            json.dump(summary, file, indent=4)
+        print(
+            colored(
+                f"{summary['succeeded']} reports generated, {summary['failed']} failed, "
+                f"{summary['api_calls']} API calls in {summary['seconds']} s "
+                f"(summary in {summary_path})",
+                "green" if not summary["failed"] else "red",
+            )
+        )
+    elif command == "--enqueue":
+        if not 2 <= len(arguments) <= 3:
+            sys.exit(colored(usage, "red"))
+        try:
+            dates = plan_dates(
+                *arguments[:2],
+                arguments[2] if len(arguments) == 3 else None,
+                get_current_date(),
+            )
+        except ValueError as error:
+            sys.exit(colored(str(error), "red"))
+        print(
+            colored(
+                f"Queued {job_queue.enqueue(arguments[0], dates)} reports.", "green"
+            )
+        )
+    elif command == "--work":
+        use_background_progress()
+        if "--metrics" in arguments:
+            if arguments.index("--metrics") + 1 == len(arguments):
+                sys.exit(colored(usage, "red"))
+            host, _, port = arguments[arguments.index("--metrics") + 1].rpartition(":")
+            serve_metrics(host or "127.0.0.1", int(port))
+        processed = run_worker(drain="--drain" in arguments)
+        print(colored(f"Processed {processed} queued reports.", "green"))
+    elif command == "--queue-info":
+        info = job_queue.info()
+        if not info:
+            print(colored("The queue is empty.", "green"))
+        for status in ("queued", "running", "done", "failed"):
+            if status in info:
+                print(colored(f"{status}: {info[status]} jobs", "green"))
+    elif command == "--archive-info":
+        locations = observation_archive.info()
+        if not locations:
+            print(colored("The observation archive is empty.", "green"))
+        for location, days, first, last, historical in locations:
+            print(
+                colored(
+                    f"{location}: {days} days from {first} to {last} "
+                    f"({historical} observed, {days - historical} forecast)",
+                    "green",
+                )
+            )
+    elif command == "--trend":
+        if len(arguments) != 3:
+            sys.exit(colored(usage, "red"))
+        try:
+            generate_trend_report(*arguments)
+        except ValueError as error:
+            sys.exit(colored(str(error), "red"))
+    elif command == "--mock-server":
+        if not arguments:
+            sys.exit(colored(usage, "red"))
+        host, _, port = (
+            arguments[1] if len(arguments) > 1 else "127.0.0.1:8081"
+        ).rpartition(":")
+        serve_fixtures(arguments[0], host or "127.0.0.1", int(port))
+    elif command == "--benchmark":
+        save_baseline = "--save-baseline" in arguments
+        arguments = [
+            argument for argument in arguments if argument != "--save-baseline"
+        ]
+        if not arguments:
+            sys.exit(colored(usage, "red"))
+        baseline_path = (
+            arguments[1] if len(arguments) > 1 else "benchmark_baseline.json"
+        )
+        try:
+            results = run_benchmarks(arguments[0])
+        except ValueError as error:
+            sys.exit(colored(str(error), "red"))
+        baseline = {}
+        if not save_baseline and os.path.exists(baseline_path):
+            with open(baseline_path) as file:
+                baseline = json.load(file)
+        regressions = compare_benchmarks(results, baseline)
+        for stage, result in results.items():
+            print(
+                colored(
+                    f"{stage}: mean {result['mean'] * 1000:.1f} ms, "
+                    f"p95 {result['p95'] * 1000:.1f} ms, "
+                    f"peak {result['peak'] / 1024 / 1024:.1f} MiB",
+                    "red" if stage in regressions else "green",
+                )
+            )
+        if save_baseline:
+            with open(baseline_path, "w") as file:
+                json.dump(results, file, indent=4)
+            print(colored(f"Baseline saved to {baseline_path}", "green"))
+        elif regressions:
+            sys.exit(
+                colored(
+                    f"{len(regressions)} stages regressed by more than "
+                    f"{benchmark_threshold:.0%}: {', '.join(regressions)}",
+                    "red",
+                )
+            )
+    elif command == "--load-test":
+        http = "--http" in arguments
+        arguments = [argument for argument in arguments if argument != "--http"]
+        if not arguments:
+            sys.exit(colored(usage, "red"))
+        try:
+            results = run_load_test(
+                arguments[0],
+                int(arguments[1]) if len(arguments) > 1 else 20,
+                (
+                    [int(level) for level in arguments[2].split(",")]
+                    if len(arguments) > 2
+                    else (1, 2, 4)
+                ),
+                http=http,
+            )
+        except ValueError as error:
+            sys.exit(colored(str(error), "red"))
+        for result in results:
+            print(
+                colored(
+                    f"concurrency {result['concurrency']}: "
+                    f"{result['throughput']} reports/s, p50 {result['p50']} s, "
+                    f"p95 {result['p95']} s, p99 {result['p99']} s, "
+                    f"{result['failed']}/{result['requests']} failed, "
+                    f"CPU {result['cpu_utilization']:.0%}, "
+                    f"max RSS {result['max_rss_mb']} MiB",
+                    "red" if result["failed"] else "green",
+                )
+            )
+    elif command == "--serve":
+        host, _, port = (arguments[0] if arguments else "127.0.0.1:8000").rpartition(
+            ":"
+        )
+        serve(host or "127.0.0.1", int(port))
+    else:
+        sys.exit(colored(f"Unknown command {command}", "red"))
+
+
+def use_background_progress():
+    global progress
+    if progress.mode == "spinner":
+        progress = Progress("off")
+
+
+def read_manifest(path):
+    with open(path, newline="") as file:
+        if path.lower().endswith(".json"):
+            rows = json.load(file)
+        else:
+            rows = list(csv.DictReader(file))
+    return [
+        (
+            str(row.get("location") or "").strip(),
+            str(row.get("start") or "").strip(),
+            str(row.get("end") or "").strip() or None,
+        )
+        for row in rows
+    ]
+
+
+def plan_batch(rows, current_date):
+    groups, failures, seen = {}, [], set()
+    for place, start_date, end_date in rows:
+        try:
+            dates = plan_dates(place, start_date, end_date, current_date)
+        except ValueError as error:
+            failures.append(
+                {
+                    "location": place,
+                    "date": start_date if not end_date else f"{start_date}:{end_date}",
+                    "status": "failed",
+                    "error": str(error),
+                }
+            )
+            continue
+        location = normalize_location(place)
+        group = groups.setdefault(location, (place, []))
+        for date in dates:
+            if (location, date) not in seen:
+                seen.add((location, date))
+                group[1].append(date)
+    return [(place, sorted(dates)) for place, dates in groups.values()], failures
+
+
+def run_batch(rows, workers=None, current_date=None):
+    start = perf_counter()
+    api_calls = metrics.total("weather_api_calls_total")
+    current_date = current_date or get_current_date()
+    groups, results = plan_batch(rows, current_date)
+    with ThreadPoolExecutor(max_workers=max(1, workers or batch_workers)) as executor:
+        for group_results in executor.map(
+            lambda group: run_location(*group, current_date), groups
+        ):
+            results.extend(group_results)
+    return {
+        "succeeded": sum(result["status"] == "ok" for result in results),
+        "failed": sum(result["status"] == "failed" for result in results),
+        "api_calls": metrics.total("weather_api_calls_total") - api_calls,
+        "seconds": round(perf_counter() - start, 3),
+        "reports": results,
+    }
+
+
+def run_location(place, dates, current_date):
+    start = perf_counter()
+    try:
+        responses, fetched = fetch_reports(place, dates, current_date)
+    except Exception as error:
+        return [
+            {
+                "location": place,
+                "date": str(date),
+                "status": "failed",
+                "error": str(error),
+                "seconds": round(perf_counter() - start, 3),
+            }
+            for date in dates
+        ]
+    results, indexes = [], {}
+    for date in dates:
+        start = perf_counter() - fetched
+        try:
+            with progress.report(place, date), measure_report(fetched) as report:
+                response, flag = responses[date]
+                if "error" in response:
+                    raise ValueError(response["error"]["message"])
+                file_name, pdf = render_pdf(
+                    response,
+                    flag=flag,
+                    date=date,
+                    days=index_response(indexes, response, flag),
+                )
+                report["file_name"] = file_name
+                output_pdf(pdf, file_name)
+        except Exception as error:
+            results.append(
+                {
+                    "location": place,
+                    "date": str(date),
+                    "status": "failed",
+                    "error": str(error),
+                    "seconds": round(perf_counter() - start, 3),
+                }
+            )
+        else:
+            results.append(
+                {
+                    "location": place,
+                    "date": str(date),
+                    "status": "ok",
+                    "file": file_name,
+                    "seconds": round(perf_counter() - start, 3),
+                }
+            )
+    return results
+
+
+def run_worker(queue=None, worker=None, drain=False, poll=1.0):
+    queue = queue or job_queue
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}:{get_ident()}"
+    processed = 0
+    while True:
+        job = queue.claim(worker)
+        if job is None:
+            wait = queue.next_available()
+            if drain and wait is None:
+                return processed
+            sleep(poll if wait is None else min(poll, wait))
+            continue
+        job_id, place, date = job
+        stop = Event()
+        heartbeat = Thread(
+            target=renew_lease, args=(queue, job_id, worker, stop), daemon=True
+        )
+        heartbeat.start()
+        try:
+            file_name, body = generate_report(place, date)
+            temporary_path = f"{file_name}.{os.getpid()}.tmp"
+            with open(temporary_path, "wb") as file:
+                file.write(body)
+            os.replace(temporary_path, file_name)
+        except Exception as error:
+            queue.fail(job_id, worker, str(error))
+        else:
+            queue.complete(job_id, worker, file_name)
+        finally:
+            stop.set()
+            heartbeat.join()
+        processed += 1
+        if metrics_path:
+            metrics.write()
+
+
+def renew_lease(queue, job_id, worker, stop):
+    while not stop.wait(queue.lease / 3):
+        if not queue.renew(job_id, worker):
+            return
+
+
+def serve(host, port):
+    use_background_progress()
+    server = ReportServer((host, port))
+    print(colored(f"Serving weather reports on http://{host}:{port}/report", "green"))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def serve_metrics(host, port):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    print(
+        colored(
+            f"Serving metrics on http://{host}:{server.server_address[1]}/metrics",
+            "green",
+        )
+    )
+    return server
+
+
+def serve_fixtures(directory, host, port):
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    server.store = FixtureStore(directory)
+    print(
+        colored(
+            f"Serving fixtures from {directory} on http://{host}:{port}, "
+            f"set WEATHER_API_URL=http://{host}:{port}/v1 and "
+            f"WEATHER_ICON_URL=http://{host}:{port}",
+            "green",
+        )
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def run_benchmarks(directory, warmup=None, repeats=None):
+    global progress, icon_store, http_client, replay_dir
+    fixtures = FixtureStore(directory, latency=0, error_rate=0)
+    response = next(
+        (
+            response
+            for key, response in fixtures.responses()
+            if urlparse(key).path.endswith("/forecast.json")
+        ),
+        None,
+    )
+    if response is None:
+        raise ValueError(f"No forecast.json fixture recorded in {directory}")
+    saved = progress, icon_store, http_client, replay_dir
+    progress, http_client, replay_dir = Progress("off"), HttpClient(), directory
+    try:
+        with TemporaryDirectory() as temporary_directory:
+            icon_store = IconStore(temporary_directory)
+            date = response["forecast"]["forecastday"][0]["date"]
+            days = Day.index_days(response)
+            day = days[date]
+            pdf = render_pdf(response, flag="forecast", date=date, days=days)[1]
+            stages = {
+                "generate_forecast_for_day": lambda: Day.generate_forecast_for_day(
+                    date, response
+                ),
+                "index_days": lambda: Day.index_days(response),
+                "plot_current_condition": lambda: plot_current_condition(day),
+            }
+            for function in chart_functions([plot_uv_aqi]):
+                stages[function.__name__] = lambda function=function: function(day)
+            stages["plot_graphs"] = lambda: plot_graphs(day, [plot_uv_aqi])
+            stages["render_pdf"] = lambda: render_pdf(
+                response, flag="forecast", date=date, days=days
+            )
+            stages["output_pdf"] = lambda: output_pdf(pdf)
+            stages["generate_pdf"] = lambda: generate_pdf_in(
+                temporary_directory, response, flag="forecast", date=date
+            )
+            return {
+                stage: benchmark_stage(function, warmup, repeats)
+                for stage, function in stages.items()
+            }
+    finally:
+        progress, icon_store, http_client, replay_dir = saved
+
+
+def generate_pdf_in(directory, *args, **kwargs):
+    with chdir(directory):
+        generate_pdf(*args, **kwargs)
+
+
+def benchmark_stage(function, warmup=None, repeats=None):
+    warmup = benchmark_warmup if warmup is None else warmup
+    repeats = max(1, repeats or benchmark_repeats)
+    for _ in range(warmup):
+        function()
+    timings = []
+    for _ in range(repeats):
+        start = perf_counter()
+        function()
+        timings.append(perf_counter() - start)
+    timings.sort()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    function()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    if not tracing:
+        tracemalloc.stop()
+    return {
+        "mean": sum(timings) / len(timings),
+        "p95": percentile(timings, 95),
+        "peak": peak,
+        "repeats": repeats,
+    }
+
+
+def percentile(values, rank):
+    return values[max(0, -(-len(values) * rank // 100) - 1)] if values else 0
+
+
+def compare_benchmarks(results, baseline, threshold=None):
+    threshold = benchmark_threshold if threshold is None else threshold
+    return [
+        stage
+        for stage, result in results.items()
+        if stage in baseline
+        and result["mean"] > baseline[stage]["mean"] * (1 + threshold)
+    ]
+
+
+def plan_load(store, count, mix=None, seed=None):
+    weights = {}
+    for part in (mix or load_mix).split(","):
+        kind, _, weight = part.partition("=")
+        weights[kind.strip()] = float(weight or 1)
+    forecasts, histories = {}, {}
+    for key, response in store.responses():
+        place = dict(parse_qsl(urlparse(key).query)).get("q", "")
+        dates = [
+            day["date"] for day in response.get("forecast", {}).get("forecastday", [])
+        ]
+        if urlparse(key).path.endswith("/forecast.json") and dates:
+            forecasts[place] = max(forecasts.get(place, []), dates, key=len)
+        else:
+            histories.setdefault(place, set()).update(dates)
+    if not forecasts and not histories:
+        raise ValueError(
+            f"No forecast.json or history.json fixtures recorded in {store.directory}"
+        )
+    today = min(
+        (dates[0] for dates in forecasts.values()),
+        default=str(
+            datetime.date.fromisoformat(max(max(dates) for dates in histories.values()))
+            + datetime.timedelta(days=1)
+        ),
+    )
+    pools = {
+        "current": [
+            (place, dates[0]) for place, dates in forecasts.items() if dates[0] == today
+        ],
+        "forecast": [
+            (place, date)
+            for place, dates in forecasts.items()
+            for date in dates
+            if date > today
+        ],
+        "historical": [
+            (place, date)
+            for place, dates in histories.items()
+            for date in sorted(dates)
+            if date < today
+        ],
+    }
+    kinds = [kind for kind in pools if pools[kind] and weights.get(kind)]
+    if not kinds:
+        raise ValueError("No recorded fixtures match WEATHER_LOAD_MIX")
+    random = Random(load_seed if seed is None else seed)
+    return today, [
+        random.choice(pools[kind])
+        for kind in random.choices(kinds, [weights[kind] for kind in kinds], k=count)
+    ]
+
+
+def run_load_test(directory, requests=20, levels=(1, 2, 4), http=False):
+    global api_base_url, icon_base_url, fixed_today, replay_dir, api_key
+    global http_client, response_cache, icon_store, progress, observation_archive
+    store = FixtureStore(directory)
+    today, jobs = plan_load(store, requests)
+    mock = ThreadingHTTPServer(("127.0.0.1", 0), MockHandler)
+    mock.daemon_threads = True
+    mock.store = store
+    Thread(target=mock.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{mock.server_address[1]}"
+    saved = (api_base_url, icon_base_url, fixed_today, replay_dir, api_key)
+    saved += (http_client, response_cache, icon_store, progress, observation_archive)
+    server = None
+    try:
+        with TemporaryDirectory() as temporary_directory:
+            api_base_url, icon_base_url, fixed_today, replay_dir = (
+                f"{base_url}/v1",
+                base_url,
+                today,
+                None,
+            )
+            api_key = "mock"
+            http_client = HttpClient(pool_size=max(max(levels), max_workers))
+            response_cache = ResponseCache(
+                os.path.join(temporary_directory, "responses.sqlite3"), max_bytes=0
+            )
+            icon_store = IconStore(os.path.join(temporary_directory, "icons"))
+            observation_archive = ObservationArchive(
+                os.path.join(temporary_directory, "archive.sqlite3")
+            )
+            progress = Progress("off")
+            if http:
+                server = ReportServer(
+                    ("127.0.0.1", 0), workers=max(levels), queue_size=requests
+                )
+                Thread(target=server.serve_forever, daemon=True).start()
+                report_url = f"http://127.0.0.1:{server.server_address[1]}/report"
+
+                def target(job):
+                    with urlopen(
+                        f"{report_url}?location={quote(job[0])}&date={job[1]}"
+                    ) as response:
+                        response.read()
+
+            else:
+
+                def target(job):
+                    generate_report(*job)
+
+            return [run_load(target, jobs, level) for level in levels]
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        mock.shutdown()
+        mock.server_close()
+        api_base_url, icon_base_url, fixed_today, replay_dir, api_key = saved[:5]
+        http_client, response_cache, icon_store, progress, observation_archive = saved[
+            5:
+        ]
+
+
+def run_load(target, jobs, concurrency):
+    def timed(job):
+        start = perf_counter()
+        try:
+            target(job)
+        except Exception:
+            return perf_counter() - start, False
+        return perf_counter() - start, True
+
+    cpu, start = os.times(), perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed, jobs))
+    seconds = perf_counter() - start
+    cpu_seconds = sum(os.times()[:2]) - sum(cpu[:2])
+    latencies = sorted(latency for latency, ok in outcomes)
+    succeeded = sum(ok for latency, ok in outcomes)
+    try:
+        from resource import getrusage, RUSAGE_SELF
+
+        max_rss = round(getrusage(RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        max_rss = None
+    return {
+        "concurrency": concurrency,
+        "requests": len(jobs),
+        "failed": len(jobs) - succeeded,
+        "seconds": round(seconds, 3),
+        "throughput": round(succeeded / seconds, 3),
+        "p50": round(percentile(latencies, 50), 3),
+        "p95": round(percentile(latencies, 95), 3),
+        "p99": round(percentile(latencies, 99), 3),
+        "cpu_utilization": round(cpu_seconds / seconds, 3),
+        "max_rss_mb": max_rss,
+    }
+
+
+def generate_report(place, date):
+    current_date = get_current_date()
+    dates = plan_dates(place, date, None, current_date)
+    with progress.report(place, dates[0]), measure_report() as report:
+        response, flag = fetch_range(place, dates, current_date)[dates[0]]
+        if "error" in response:
+            raise ValueError(response["error"]["message"])
+        file_name, pdf = render_pdf(
+            response, flag=flag, date=dates[0], days=index_response({}, response, flag)
+        )
+        report["file_name"] = file_name
+        return file_name, output_pdf(pdf)
+
+
+class ReportServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, workers=None, queue_size=None):
+        super().__init__(address, ReportHandler)
+        workers = workers or server_workers
+        queue_size = server_queue_size if queue_size is None else queue_size
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.slots = BoundedSemaphore(workers + queue_size)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ReportHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self.send(200, b"ok\n", "text/plain")
+        elif url.path == "/report":
+            self.send_report(parse_qs(url.query))
+        elif url.path == "/metrics":
+            self.send(200, metrics.render().encode(), "text/plain; version=0.0.4")
+        else:
+            self.send(404, b"Not found\n", "text/plain")
+
+    def send_report(self, query):
+        place = query.get("location", [""])[0].strip()
+        date = query.get("date", [""])[0].strip()
+        if not self.server.slots.acquire(blocking=False):
+            self.send(503, b"Server busy, try again later\n", "text/plain")
+            return
+        try:
+            file_name, content = self.server.executor.submit(
+                generate_report, place, date
+            ).result()
+        except ValueError as error:
+            self.send(400, f"{error}\n".encode(), "text/plain")
+        except MissingApiKeyError:
+            self.send(503, b"No API key configured on the server\n", "text/plain")
+        except Exception as error:
+            self.send(
+                502, f"Report generation failed: {error}\n".encode(), "text/plain"
+            )
+        else:
+            self.send(
+                200,
+                content,
+                "application/pdf",
+                {"Content-Disposition": f"inline; filename*=UTF-8''{quote(file_name)}"},
+            )
+        finally:
+            self.server.slots.release()
+
+    def send(self, status, body, content_type, headers=None):
+        metrics.inc("weather_server_responses_total", status=status)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for header in headers or {}:
+            self.send_header(header, headers[header])
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if server_access_log:
+            super().log_message(format, *args)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if urlparse(self.path).path == "/metrics":
+            status, body = 200, metrics.render().encode()
+            content_type = "text/plain; version=0.0.4"
+        else:
+            status, body, content_type = 404, b"Not found\n", "text/plain"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status, content_type, body = self.server.store.respond(self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
 def prompt_parse_and_run(place, start_date, end_date=None):
+    current_date = get_current_date()
+    try:
+        dates = plan_dates(place, start_date, end_date, current_date)
+    except ValueError as error:
+        sys.exit(colored(str(error), "red"))
+    progress.start("Verifying user request")
+    progress.done("User request verified :check_mark_button:  ")
+    responses, fetched = fetch_reports(place, dates, current_date)
+    indexes = {}
+    for date in dates:
+        response, response_flag = responses[date]
+        if "error" in response:
+            record_report(fetched, "failed")
+            sys.exit(colored(response["error"]["message"], "red"))
+        with progress.report(place, date):
+            generate_pdf(
+                response,
+                flag=response_flag,
+                date=date,
+                days=index_response(indexes, response, response_flag),
+                elapsed=fetched,
+            )
+
+
+def fetch_reports(place, dates, current_date):
+    start = perf_counter()
+    try:
+        with progress.report(place):
+            progress.start("Requesting API")
+            responses = fetch_range(place, dates, current_date)
+    except BaseException:
+        for date in dates:
+            record_report(perf_counter() - start, "failed")
+        raise
+    return responses, perf_counter() - start
+
+
+def index_response(indexes, response, flag):
+    if id(response) not in indexes:
+        indexes[id(response)] = Day.index_days(response, aqi=flag != "historical")
+        if archive_enabled:
+            with tracer.span("archive"):
+                observation_archive.store(
+                    indexes[id(response)].values(),
+                    "historical" if flag == "historical" else "forecast",
+                )
+    return indexes[id(response)]
+
+
+def plan_dates(place, start_date, end_date, current_date):
     if not verify_location(place):
-        sys.exit(colored("Invalid location provided.", "red"))
+        raise ValueError("Invalid location provided.")
     elif not verify_date(start_date):
-        sys.exit(colored("Inavlid first date argument provided.", "red"))
+        raise ValueError("Inavlid first date argument provided.")
     elif end_date is not None and not verify_date(end_date):
-        sys.exit(colored("Inavlid second date argument provided.", "red"))
+        raise ValueError("Inavlid second date argument provided.")
     if not end_date:
         flag = "singular"
     else:
@@ -348,70 +2181,205 @@ def prompt_parse_and_run(place, start_date, end_date=None):
         if flag == "range":
             end_date = datetime.date(*extract_date(end_date))
     except ValueError:
-        sys.exit(colored("Inavlid date or date range provided.", "red"))
+        raise ValueError("Inavlid date or date range provided.") from None
     if flag == "range" and start_date == end_date:
         flag = "singular"
-    current_date = datetime.date.today()
     if (
         not current_date - datetime.timedelta(days=8)
         < start_date
         < current_date + datetime.timedelta(days=3)
+    ) or (
+        flag == "range"
+        and not current_date - datetime.timedelta(days=8)
+        < end_date
+        < current_date + datetime.timedelta(days=3)
     ):
-        sys.exit(
-            colored(
-                "Forecast Weather functionality limited to 2 days ahead.\nHistorical Weather functionality limited to 7 days prior",
-                "red",
-            )
+        raise ValueError(
+            "Forecast Weather functionality limited to 2 days ahead.\nHistorical Weather functionality limited to 7 days prior"
         )
-    elif flag == "range" and not current_date - datetime.timedelta(
-        days=8
-    ) < end_date < current_date + datetime.timedelta(days=3):
-        sys.exit(
-            colored(
-                "Forecast Weather functionality limited to 2 days ahead.\nHistorical Weather functionality limited to 7 days prior",
-                "red",
+    if flag == "singular":
+        end_date = start_date
+    elif start_date > end_date:
+        start_date, end_date = end_date, start_date
+    return list(generate_dates(start_date, end_date))
+
+
+@traced
+def fetch_range(place, dates, current_date):
+    historical_dates, forecast_days = plan_requests(dates, current_date)
+    calls = [
+        history_call(place, window)
+        for window in generate_history_windows(historical_dates)
+    ]
+    if forecast_days:
+        group = [date for date in dates if date >= current_date]
+        calls.append(
+            (
+                "forecast",
+                f"{current_date}:{forecast_days}",
+                f"{api_base_url}/forecast.json?q={place}&days={forecast_days}&aqi=yes",
+                group,
+                cache_ttls["current" if current_date in group else "forecast"],
             )
         )
-    generate_animation(colored("Verifying user request", "green"), 1)
-    print(colored(emojize("User request verified :check_mark_button:  "), "green"))
-    generate_animation(colored("Requesting API", "green"), 2)
-    if flag == "singular":
-        if start_date < current_date:
-            response = get(
-                f"https://api.weatherapi.com/v1/history.json?key={API_KEY}&q={place}&dt={start_date}"
-            ).json()
-            response_flag = "historical"
+    fetched = {}
+    for call, response in zip(calls, fetch_cached(place, calls)):
+        for date in call[3]:
+            fetched[date] = response
+    retries = [
+        history_call(place, [date])
+        for call in calls
+        if call[0] == "history" and len(call[3]) > 1
+        for date in call[3]
+        if not covers_date(fetched[date], date)
+    ]
+    for call, response in zip(retries, fetch_cached(place, retries)):
+        fetched[call[3][0]] = response
+    responses = {}
+    for date in dates:
+        response = fetched[date]
+        if date != current_date and not covers_date(response, date):
+            response = {
+                "error": {"message": f"No weather data returned for {place} on {date}."}
+            }
+        if date < current_date:
+            responses[date] = (response, "historical")
+        elif date == current_date:
+            responses[date] = (response, "current")
         else:
-            difference = (start_date - current_date).days
-            response = get(
-                f"https://api.weatherapi.com/v1/forecast.json?key={API_KEY}&q={place}&days={difference+1}&aqi=yes"
-            ).json()
-            if difference == 0:
-                response_flag = "current"
-            else:
-                response_flag = "forecast"
-        print(colored(emojize("API Request received :desktop_computer:"), "green"))
-        generate_pdf(response, flag=response_flag, date=start_date)
-    else:
-        if start_date > end_date:
-            start_date, end_date = end_date, start_date
-        for date in generate_dates(start_date, end_date):
-            if date < current_date:
-                response = get(
-                    f"https://api.weatherapi.com/v1/history.json?key={API_KEY}&q={place}&dt={date}"
-                ).json()
-                response_flag = "historical"
-            else:
-                difference = (date - current_date).days
-                response = get(
-                    f"https://api.weatherapi.com/v1/forecast.json?key={API_KEY}&q={place}&days={difference+1}&aqi=yes"
-                ).json()
-                if difference == 0:
-                    response_flag = "current"
-                else:
-                    response_flag = "forecast"
-            print(colored(emojize("API Request received :desktop_computer:"), "green"))
-            generate_pdf(response, flag=response_flag, date=date)
+            responses[date] = (response, "forecast")
+    return responses
+
+
+def history_call(place, window):
+    return (
+        "history",
+        f"{window[0]}:{window[-1]}",
+        f"{api_base_url}/history.json?q={place}&dt={window[0]}&end_dt={window[-1]}",
+        window,
+        cache_ttls["history"],
+    )
+
+
+def covers_date(response, date):
+    if "error" in response:
+        return True
+    return str(date) in {
+        day["date"] for day in response.get("forecast", {}).get("forecastday", ())
+    }
+
+
+def fetch_cached(place, calls):
+    results = [
+        None if record_dir else response_cache.get(call[0], place, call[1])
+        for call in calls
+    ]
+    for call, result in zip(calls, results):
+        metrics.inc(
+            "weather_cache_requests_total",
+            endpoint=call[0],
+            result="miss" if result is None else "hit",
+        )
+        if result is not None:
+            progress.done("API Response loaded from cache :card_file_box:")
+    missing = [index for index, result in enumerate(results) if result is None]
+    urls = [calls[index][2] for index in missing]
+    if urls:
+        key = "replay" if replay_dir else get_api_key()
+        urls = [f"{url}&key={key}" for url in urls]
+    for index, response in zip(missing, fetch_all(urls)):
+        endpoint, date, url, group, ttl = calls[index]
+        metrics.inc("weather_api_calls_total", endpoint=endpoint)
+        results[index] = response.json()
+        if response.status_code == 200 and "error" not in results[index]:
+            response_cache.put(endpoint, place, date, results[index], ttl)
+        progress.done("API Request received :desktop_computer:")
+    return results
+
+
+def get_current_date():
+    if fixed_today:
+        return datetime.date.fromisoformat(fixed_today)
+    return datetime.date.today()
+
+
+def get_api_key():
+    global api_key
+    if not api_key:
+        api_key = os.environ.get("WEATHER_API_KEY", "").strip()
+        if not api_key and os.path.exists("key.txt"):
+            with open("key.txt", "r") as file:
+                api_key = file.read().strip()
+        if not api_key:
+            raise MissingApiKeyError(
+                "No API key found. Set WEATHER_API_KEY or save the key in key.txt."
+            )
+    return api_key
+
+
+def normalize_location(string):
+    return " ".join(string.lower().split())
+
+
+def fetch_all(urls, workers=None):
+    if not urls:
+        return []
+    if workers is None:
+        workers = max_workers
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(urls)))) as executor:
+        return list(executor.map(fetch_limited, urls))
+
+
+def fetch_limited(url):
+    with request_slots:
+        return http_client.get(url)
+
+
+def fetch_icons(links):
+    return icon_store.fetch(links)
+
+
+def icon_url(link):
+    if icon_base_url:
+        return icon_base_url.rstrip("/") + urlparse(link).path
+    return f"https:{link}"
+
+
+def generate_icon_links():
+    for period in ("day", "night"):
+        for code in icon_codes:
+            yield f"//cdn.weatherapi.com/weather/64x64/{period}/{code}.png"
+
+
+def warm_icon_pack(directory=None):
+    store = IconStore(directory or icon_pack_dir, capacity=0)
+    links = list(generate_icon_links())
+    missing = [link for link in links if not store.has(link)]
+    store.fetch(missing)
+    return len(links), len(missing)
+
+
+def plan_requests(dates, current_date):
+    historical_dates = [date for date in dates if date < current_date]
+    forecast_dates = [date for date in dates if date >= current_date]
+    if not forecast_dates:
+        return historical_dates, 0
+    return historical_dates, (max(forecast_dates) - current_date).days + 1
+
+
+def generate_history_windows(dates, max_days=None):
+    if max_days is None:
+        max_days = history_window_days
+    window = []
+    for date in sorted(dates):
+        if window and (
+            date != window[-1] + datetime.timedelta(days=1) or len(window) == max_days
+        ):
+            yield window
+            window = []
+        window.append(date)
+    if window:
+        yield window
 
 
 def generate_dates(start_date, end_date):
@@ -439,107 +2407,50 @@ def verify_location(string):
     return False
 
 
-def start_up():
-    folder_path = os.path.join(os.getcwd(), "plots")
-    if os.path.exists(folder_path):
-        shutil.rmtree(folder_path)
-    os.mkdir(folder_path)
-
+def generate_pdf(response, flag="current", date=None, days=None, elapsed=0):
+    with measure_report(elapsed) as report:
+        file_name, pdf = render_pdf(response, flag=flag, date=date, days=days)
+        report["file_name"] = file_name
+        progress.start("Finalizing PDF")
+        output_pdf(pdf, file_name)
+    progress.done(f"{file_name} generated :slightly_smiling_face:")
+    file_path = rf"file://{os.path.join(os.getcwd(),file_name).replace(' ', '%20').replace('\\','/')}"
+    progress.done(rf":right_arrow:  {file_path}", color=None)
+    progress.newline()
 
-def clean_up():
-    try:
-        shutil.rmtree(os.path.join(os.getcwd(), "plots"))
-    except FileNotFoundError:
-        pass
 
+@traced
+def render_pdf(response, flag="current", date=None, days=None):
+    from fpdf import FPDF
 
-def generate_pdf(response, flag="current", date=None):
-    start_up()
-    generate_animation(colored("Starting PDF generation", "green"), 2)
+    progress.start("Starting PDF generation")
     if date:
         date = str(date)
     pdf = FPDF(orientation="landscape", format="A4")
     pdf.set_display_mode(zoom="fullwidth", layout="continuous")
-    print(colored(emojize("PDF generation started :bookmark_tabs:  "), "green"))
+    progress.done("PDF generation started :bookmark_tabs:  ")
     flag = flag.lower()
+    if days is None:
+        days = Day.index_days(response, aqi=flag != "historical")
     if flag == "current":
-        current_response = Day.generate_current_report(response)
-    elif flag == "forecast" and date is not None:
-        current_response = Day.generate_forecast_for_day(date, response)
-    elif flag == "historical" and date is not None:
-        current_response = Day.generate_historical_for_day(date, response)
-    pdf.add_page()
-    pdf.set_font("helvetica", "B", 22)
-    pdf.set_fill_color(0, 0, 0)
-    pdf.set_text_color(255, 255, 255)
-    pdf.set_line_width(0.5)
-    plot_current_condition(current_response)
-    pdf.image("plots/Current_condition_plot.jpg", x=20, y=41)
-    pdf.cell(
-        275,
-        24,
-        f"Weather Report for {current_response.name}, {current_response.country}",
-        align="C",
-        fill=True,
-        border=1,
-    )
-    pdf.set_font_size(14)
-    pdf.set_xy(120, 26)
-    pdf.cell(50, 8, f"Date: {current_response.date}", align="C", fill=True)
-    pdf.set_text_color(0, 0, 0)
-    pdf.set_xy(10, 33.5)
+        current_response = Day.generate_current_report(response, days)
+    elif flag in ("forecast", "historical") and date is not None:
+        current_response = days[date]
     if flag == "current":
-        pdf.cell(
-            275,
-            10,
-            f"Latitude: {current_response.latitude}{" "*8}Longitude: {current_response.longitude}{" "*8}Localtime: {current_response.localtime}{" "*8}Last Updated: {current_response.last_updated}",
-            align="C",
-            border=1,
-        )
+        details = f"Latitude: {current_response.latitude}{" "*8}Longitude: {current_response.longitude}{" "*8}Localtime: {current_response.localtime}{" "*8}Last Updated: {current_response.last_updated}"
     elif flag in ("forecast", "historical"):
-        pdf.cell(
-            275,
-            10,
-            f"Latitude: {current_response.latitude}{" "*8}Longitude: {current_response.longitude}{" "*8}Localtime: {current_response.localtime}",
-            align="C",
-            border=1,
-        )
+        details = f"Latitude: {current_response.latitude}{" "*8}Longitude: {current_response.longitude}{" "*8}Localtime: {current_response.localtime}"
+    add_page_header(
+        pdf,
+        f"Weather Report for {current_response.name}, {current_response.country}",
+        f"Date: {current_response.date}",
+        details,
+        image=plot_current_condition(current_response),
+    )
 
     # Weather
 
-    generate_animation(colored("Adding base data", "green"), 2)
-    pdf.set_xy(20, 75)
-    cell_width, cell_height, cell_seperation = 120, 25, 6.2
-    pdf.set_font_size(16)
-    pdf.set_fill_color(255, 0, 0)
-    if flag == "current":
-        pdf.cell(
-            cell_width,
-            cell_height - 10,
-            f"Current Weather",
-            border=1,
-            align="C",
-            fill=True,
-        )
-    elif flag == "forecast":
-        pdf.cell(
-            cell_width,
-            cell_height - 10,
-            f"Forecasted Weather",
-            border=1,
-            align="C",
-            fill=True,
-        )
-    elif flag == "historical":
-        pdf.cell(
-            cell_width,
-            cell_height - 10,
-            f"Historical Weather",
-            border=1,
-            align="C",
-            fill=True,
-        )
-    pdf.set_font_size(14)
+    progress.start("Adding base data")
     if flag == "current":
         titles = [
             f"Temperature: {current_response.temp_c} °C / {current_response.temp_f} °F",
@@ -586,32 +2497,18 @@ def generate_pdf(response, flag="current", date=None):
             f"Average Visibility: {current_response.vis_km} Km / {current_response.vis_miles} miles",
             f"UV Index: {current_response.uv}",
         ]
-    y_shift = 84
-    for title in range(len(titles)):
-        pdf.set_xy(20, y_shift)
-        if title == len(titles) - 1:
-            pdf.cell(cell_width, cell_height, titles[title], border="LRB", align="C")
-        else:
-            pdf.cell(cell_width, cell_height, titles[title], border="LR", align="C")
-        y_shift += cell_seperation
+    headings = {
+        "current": "Current Weather",
+        "forecast": "Forecasted Weather",
+        "historical": "Historical Weather",
+    }
+    add_section(pdf, 20, 75, headings[flag], (255, 0, 0), titles, 84)
+    cell_height, cell_seperation = 25, 6.2
 
     # Air Qualtity Data
 
     if flag in ("current", "forecast"):
         cell_height, cell_seperation = 19, 6.1
-        pdf.set_xy(155, 75)
-        pdf.set_fill_color(0, 255, 0)
-        pdf.set_font_size(16)
-        pdf.cell(
-            cell_width,
-            cell_height - 10,
-            f"Air Quality Data",
-            border=1,
-            align="C",
-            fill=True,
-        )
-        pdf.ln(2)
-        pdf.set_font_size(14)
         titles = [
             f"Carbon Monoxide: {current_response.co} ug/m3",
             f"Ozone: {current_response.o3} ug/m3",
@@ -620,37 +2517,10 @@ def generate_pdf(response, flag="current", date=None):
             f"PM2.5: {current_response.pm2_5} ug/m3",
             f"PM10: {current_response.pm_10} ug/m3",
         ]
-        y_shift = 82
-        for title in range(len(titles)):
-            pdf.set_xy(155, y_shift)
-            if title == len(titles) - 1:
-                pdf.cell(
-                    cell_width, cell_height, titles[title], border="LRB", align="C"
-                )
-            else:
-                pdf.cell(cell_width, cell_height, titles[title], border="LR", align="C")
-            y_shift += cell_seperation
+        add_section(pdf, 155, 75, "Air Quality Data", (0, 255, 0), titles, 82, 19, 6.1)
 
     # Astronomical Data
 
-    if flag in ("current", "forecast"):
-        pdf.set_xy(155, 135)
-        y_shift = 140
-    elif flag == "historical":
-        pdf.set_xy(155, 75)
-        y_shift = 82
-    pdf.set_fill_color(25, 114, 230)
-    pdf.set_font_size(16)
-    pdf.cell(
-        cell_width,
-        cell_height - 10,
-        f"Astronomical Data",
-        border=1,
-        align="C",
-        fill=True,
-    )
-    pdf.ln(2)
-    pdf.set_font_size(14)
     titles = [
         f"Sunrise: {current_response.astro["sun_rise"]}",
         f"Sunset: {current_response.astro["sun_set"]}",
@@ -659,14 +2529,31 @@ def generate_pdf(response, flag="current", date=None):
         f"Moon Phase: {current_response.astro["moon_phase"]}",
         f"Moon Illumination: {current_response.astro["moon_illumination"]} %",
     ]
-    for title in range(len(titles)):
-        pdf.set_xy(155, y_shift)
-        if title == len(titles) - 1:
-            pdf.cell(cell_width, cell_height, titles[title], border="LRB", align="C")
-        else:
-            pdf.cell(cell_width, cell_height, titles[title], border="LR", align="C")
-        y_shift += cell_seperation
-    print(colored(emojize("Base data added :pen:   "), "green"))
+    if flag in ("current", "forecast"):
+        add_section(
+            pdf,
+            155,
+            135,
+            "Astronomical Data",
+            (25, 114, 230),
+            titles,
+            140,
+            cell_height,
+            cell_seperation,
+        )
+    elif flag == "historical":
+        add_section(
+            pdf,
+            155,
+            75,
+            "Astronomical Data",
+            (25, 114, 230),
+            titles,
+            82,
+            cell_height,
+            cell_seperation,
+        )
+    progress.done("Base data added :pen:   ")
     pdf.add_page()
     pdf.set_fill_color(0, 0, 0)
     pdf.set_text_color(255, 255, 255)
@@ -679,110 +2566,489 @@ def generate_pdf(response, flag="current", date=None):
         fill=True,
         border=1,
     )
-    generate_animation(colored("Generating graphs", "green"), 2)
+    progress.start("Generating graphs")
+    forecast_report_for_current = days[current_response.date]
     if flag in ("current", "forecast"):
-        forecast_report_for_current = Day.generate_forecast_for_day(
-            current_response.date, response
-        )
-        plot_graphs(forecast_report_for_current)
-        plot_uv_aqi(forecast_report_for_current)
+        charts = plot_graphs(forecast_report_for_current, [plot_uv_aqi])
     elif flag == "historical":
-        forecast_report_for_current = Day.generate_historical_for_day(
-            current_response.date, response
-        )
-        plot_graphs(forecast_report_for_current)
-        plot_uv(forecast_report_for_current)
-    print(colored(emojize("Graphs generated :bar_chart:  "), "green"))
-    pdf.image(
-        rf"plots/Hourwise_Weather_plot_{current_response.date}.jpg",
-        x=-20,
-        y=35,
-        w=325,
-        h=80,
-    )
-    pdf.image(
-        rf"plots/Hourwise_Weather_legend_plot_{current_response.date}.jpg",
-        x=30,
-        y=120,
-        w=250,
-        h=80,
-    )
+        charts = plot_graphs(forecast_report_for_current, [plot_uv])
+    progress.done("Graphs generated :bar_chart:  ")
+    hourly_weather, hourly_weather_legend, *files = charts
+    pdf.image(hourly_weather, x=-20, y=35, w=325, h=80)
+    pdf.image(hourly_weather_legend, x=30, y=120, w=250, h=80)
     pdf.add_page()
-    generate_animation(colored("Adding graphs to PDF", "green"), 2)
-    if flag in ("current", "forecast"):
-        files = [
-            rf"plots/Temperature_plot_{current_response.date}.jpg",
-            rf"plots/Wind_Speed_plot_{current_response.date}.jpg",
-            rf"plots/Gust_plot_{current_response.date}.jpg",
-            rf"plots/Pressure_plot_{current_response.date}.jpg",
-            rf"plots/Chance_plot_{current_response.date}.jpg",
-            rf"plots/Precipitation_Snowfall_plot_{current_response.date}.jpg",
-            rf"plots/Humidity_CloudCover_plot_{current_response.date}.jpg",
-            rf"plots/Dewpoint_plot_{current_response.date}.jpg",
-            rf"plots/Visibility_plot_{current_response.date}.jpg",
-            rf"plots/UV_AQI_plot_{current_response.date}.jpg",
-        ]
-    elif flag == "historical":
-        files = [
-            rf"plots/Temperature_plot_{current_response.date}.jpg",
-            rf"plots/Wind_Speed_plot_{current_response.date}.jpg",
-            rf"plots/Gust_plot_{current_response.date}.jpg",
-            rf"plots/Pressure_plot_{current_response.date}.jpg",
-            rf"plots/Chance_plot_{current_response.date}.jpg",
-            rf"plots/Precipitation_Snowfall_plot_{current_response.date}.jpg",
-            rf"plots/Humidity_CloudCover_plot_{current_response.date}.jpg",
-            rf"plots/Dewpoint_plot_{current_response.date}.jpg",
-            rf"plots/Visibility_plot_{current_response.date}.jpg",
-            rf"plots/UV_plot_{current_response.date}.jpg",
-        ]
+    progress.start("Adding graphs to PDF")
     for file in range(len(files)):
         pdf.image(files[file], x=-20, y=15, w=340, h=175)
         if file != len(files) - 1:
             pdf.add_page()
-    print(colored(emojize("Graphs added to PDF :chart_increasing:   "), "green"))
+    progress.done("Graphs added to PDF :chart_increasing:   ")
     if date is None:
         date = Day.get_date(response["location"]["localtime"])
     file_name = f'Weather_Report_{response["location"]["name"]}_{date}.pdf'
-    pdf.output(f"{file_name}")
-    clean_up()
-    generate_animation(colored("Finalizing PDF", "green"), 2)
-    print(colored(emojize(f"{file_name} generated :slightly_smiling_face:"), "green"))
-    file_path = rf"file://{os.path.join(os.getcwd(),file_name).replace(' ', '%20').replace('\\','/')}"
-    print(colored(emojize(rf":right_arrow:  {file_path}")))
-    print()
+    return file_name, pdf
+
+
+def generate_trend_report(place, start_date, end_date):
+    place, start_date, end_date = place.strip(), start_date.strip(), end_date.strip()
+    if not verify_location(place.split(",")[0]):
+        raise ValueError("Invalid Location")
+    if not verify_date(start_date) or not verify_date(end_date):
+        raise ValueError("Invalid Date")
+    start, end = (datetime.date(*extract_date(date)) for date in (start_date, end_date))
+    if end < start:
+        raise ValueError("End date must not be before the start date")
+    with measure_report() as report:
+        file_name, pdf = render_trend_pdf(place, start, end)
+        report["file_name"] = file_name
+        progress.start("Finalizing PDF")
+        output_pdf(pdf, file_name)
+    progress.done(f"{file_name} generated :slightly_smiling_face:")
+    progress.newline()
+    return file_name
+
+
+@traced
+def render_trend_pdf(place, start, end, archive=None):
+    from fpdf import FPDF
+
+    archive = archive or observation_archive
+    progress.start("Reading archived observations")
+    hours = archive.query(place, start, end, trend_fields)
+    if not len(hours["hour"]):
+        raise ValueError(
+            f"No archived observations for {place} between {start} and {end}"
+        )
+    location = archive.describe(place)
+    trend = compute_trend(hours)
+    progress.done("Archived observations loaded :card_file_box:")
+    progress.start("Starting PDF generation")
+    pdf = FPDF(orientation="landscape", format="A4")
+    pdf.set_display_mode(zoom="fullwidth", layout="continuous")
+    add_page_header(
+        pdf,
+        f"Weather Trend Report for {location['name']}, {location['country']}",
+        f"{start} to {end}",
+        f"Latitude: {location['latitude']}{" "*8}Longitude: {location['longitude']}{" "*8}Days with data: {len(trend['dates'])} of {(end - start).days + 1}",
+        subtitle_width=80,
+    )
+    dates = trend["dates"]
+    hottest, coldest = trend["temp_c_max"].argmax(), trend["temp_c_min"].argmin()
+    wettest, gustiest = (
+        trend["precip_mm_total"].argmax(),
+        trend["gust_kph_max"].argmax(),
+    )
+    add_section(
+        pdf,
+        20,
+        75,
+        "Trend Summary",
+        (255, 0, 0),
+        [
+            f"Average Temperature: {trend['temp_c_mean'].mean():.1f} °C",
+            f"Highest Temperature: {trend['temp_c_max'][hottest]:.1f} °C ({dates[hottest]})",
+            f"Lowest Temperature: {trend['temp_c_min'][coldest]:.1f} °C ({dates[coldest]})",
+            f"Total Precipitation: {trend['precip_mm_total'].sum():.1f} mm",
+            f"Wettest Day: {dates[wettest]} ({trend['precip_mm_total'][wettest]:.1f} mm)",
+            f"Total Snowfall: {trend['snow_cm_total'].sum():.1f} cm",
+            f"Average Humidity: {trend['humidity_percentage_mean'].mean():.1f} %",
+            f"Average Pressure: {trend['pressure_mb_mean'].mean():.1f} mb",
+            f"Maximum Gust Speed: {trend['gust_kph_max'][gustiest]:.1f} Kph ({dates[gustiest]})",
+        ],
+        84,
+    )
+    add_section(
+        pdf,
+        155,
+        75,
+        f"Last {trend['window']} Days",
+        (25, 114, 230),
+        [
+            f"Average Temperature: {trend['temp_c_mean_rolling'][-1]:.1f} °C",
+            f"Total Precipitation: {trend['precip_mm_rolling_total'][-1]:.1f} mm",
+            f"Average Humidity: {trend['humidity_percentage_mean_rolling'][-1]:.1f} %",
+            f"Average Pressure: {trend['pressure_mb_mean_rolling'][-1]:.1f} mb",
+            f"Average Wind Speed: {trend['wind_kph_mean_rolling'][-1]:.1f} Kph",
+        ],
+        84,
+    )
+    progress.done("PDF generation started :bookmark_tabs:  ")
+    progress.start("Generating graphs")
+    charts = plot_trend_charts(trend)
+    progress.done("Graphs generated :bar_chart:  ")
+    for chart in charts:
+        pdf.add_page()
+        pdf.image(chart, x=-20, y=15, w=340, h=175)
+    return f"Weather_Trend_{location['name']}_{start}_{end}.pdf", pdf
 
 
+def add_page_header(pdf, title, subtitle, details, image=None, subtitle_width=50):
+    pdf.add_page()
+    pdf.set_font("helvetica", "B", 22)
+    pdf.set_fill_color(0, 0, 0)
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_line_width(0.5)
+    if image is not None:
+        pdf.image(image, x=20, y=41)
+    pdf.cell(275, 24, title, align="C", fill=True, border=1)
+    pdf.set_font_size(14)
+    pdf.set_xy(145 - subtitle_width / 2, 26)
+    pdf.cell(subtitle_width, 8, subtitle, align="C", fill=True)
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_xy(10, 33.5)
+    pdf.cell(275, 10, details, align="C", border=1)
+
+
+def add_section(
+    pdf, x, y, title, color, lines, top, cell_height=25, cell_seperation=6.2
+):
+    cell_width = 120
+    pdf.set_xy(x, y)
+    pdf.set_font_size(16)
+    pdf.set_fill_color(*color)
+    pdf.cell(cell_width, cell_height - 10, title, border=1, align="C", fill=True)
+    pdf.set_font_size(14)
+    y_shift = top
+    for line in range(len(lines)):
+        pdf.set_xy(x, y_shift)
+        if line == len(lines) - 1:
+            pdf.cell(cell_width, cell_height, lines[line], border="LRB", align="C")
+        else:
+            pdf.cell(cell_width, cell_height, lines[line], border="LR", align="C")
+        y_shift += cell_seperation
+
+
+@traced
+def compute_trend(hours, window=None, max_points=None):
+    from numpy import unique, minimum, maximum, add, arange
+
+    window = max(1, window or trend_window)
+    dates, starts, counts = unique(hours["date"], return_index=True, return_counts=True)
+    trend = {"dates": dates, "window": window}
+    for field in ("temp_c", "humidity_percentage", "pressure_mb", "wind_kph"):
+        trend[f"{field}_min"] = minimum.reduceat(hours[field], starts)
+        trend[f"{field}_max"] = maximum.reduceat(hours[field], starts)
+        trend[f"{field}_mean"] = add.reduceat(hours[field], starts) / counts
+        trend[f"{field}_mean_rolling"] = rolling(trend[f"{field}_mean"], window)
+    trend["gust_kph_max"] = maximum.reduceat(hours["gust_kph"], starts)
+    for field in ("precip_mm", "snow_cm"):
+        trend[f"{field}_total"] = add.reduceat(hours[field], starts)
+    trend["precip_mm_rolling_total"] = rolling(
+        trend["precip_mm_total"], window, total=True
+    )
+    trend["precip_mm_cumulative"] = trend["precip_mm_total"].cumsum()
+    positions = arange(len(dates)).repeat(counts) + hours["hour"] / 24
+    trend["hourly_position"] = downsample(positions, max_points)
+    trend["hourly_temp_c"] = downsample(hours["temp_c"], max_points)
+    return trend
+
+
+def rolling(values, window, total=False):
+    from numpy import arange, concatenate, maximum
+
+    sums = concatenate(([0.0], values.cumsum()))
+    upper = arange(1, len(values) + 1)
+    lower = maximum(upper - window, 0)
+    totals = sums[upper] - sums[lower]
+    return totals if total else totals / (upper - lower)
+
+
+def downsample(values, max_points=None):
+    from numpy import concatenate, full, nan, nanmean
+
+    max_points = max_points or trend_max_points
+    if len(values) <= max_points:
+        return values
+    factor = -(-len(values) // max_points)
+    padding = full(-len(values) % factor, nan)
+    return nanmean(concatenate((values, padding)).reshape(-1, factor), axis=1)
+
+
+@traced
+def plot_trend_charts(trend):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from numpy import arange
+
+    dates, window = trend["dates"], trend["window"]
+    days = arange(len(dates))
+    charts = []
+    for title, panels in (
+        ("Temperature Trend", [("Temperature (°C)", "temp_c")]),
+        ("Precipitation Trend", [("Precipitation (mm)", "precip_mm")]),
+        ("Wind Trend", [("Wind Speed (Kph)", "wind_kph")]),
+        (
+            "Humidity and Pressure Trend",
+            [("Humidity (%)", "humidity_percentage"), ("Pressure (mb)", "pressure_mb")],
+        ),
+    ):
+        figure = Figure(figsize=(figure_width, figure_height))
+        FigureCanvasAgg(figure)
+        figure.suptitle(title, fontsize=title_fontsize, weight="black")
+        axes_list = figure.subplots(len(panels), 1, squeeze=False)[:, 0]
+        for axes, (label, field) in zip(axes_list, panels):
+            marker = "o" if len(dates) <= 60 else None
+            if field == "temp_c":
+                axes.fill_between(
+                    days,
+                    trend["temp_c_min"],
+                    trend["temp_c_max"],
+                    color="orange",
+                    alpha=0.3,
+                    label="Daily range",
+                )
+                axes.plot(
+                    trend["hourly_position"],
+                    trend["hourly_temp_c"],
+                    color="orange",
+                    linewidth=0.8,
+                    label="Hourly",
+                )
+            if field == "precip_mm":
+                axes.bar(
+                    days, trend["precip_mm_total"], color="blue", label="Daily total"
+                )
+                axes.plot(
+                    days,
+                    trend["precip_mm_rolling_total"],
+                    color="black",
+                    linestyle="--",
+                    label=f"{window}-day total",
+                )
+                cumulative = axes.twinx()
+                cumulative.plot(
+                    days,
+                    trend["precip_mm_cumulative"],
+                    color="green",
+                    label="Cumulative",
+                )
+                cumulative.set_ylabel(
+                    "Cumulative (mm)", fontsize=axis_label_fontsize, weight="black"
+                )
+                cumulative.tick_params(axis="y", labelsize=ticks_fontsize)
+                cumulative.legend(loc="upper right", fontsize=ticks_fontsize)
+            else:
+                axes.plot(
+                    days,
+                    trend[f"{field}_mean"],
+                    marker=marker,
+                    color="red",
+                    label="Daily mean",
+                )
+                axes.plot(
+                    days,
+                    trend[f"{field}_mean_rolling"],
+                    color="black",
+                    linestyle="--",
+                    label=f"{window}-day average",
+                )
+            if field == "wind_kph":
+                axes.plot(
+                    days,
+                    trend["gust_kph_max"],
+                    marker=marker,
+                    color="purple",
+                    label="Maximum gust",
+                )
+            axes.set_ylabel(label, fontsize=axis_label_fontsize, weight="black")
+            step = max(1, len(dates) // 15)
+            axes.set_xticks(days[::step])
+            axes.set_xticklabels(
+                dates[::step], rotation=rotation_value, fontsize=ticks_fontsize
+            )
+            axes.tick_params(axis="y", labelsize=ticks_fontsize)
+            axes.legend(loc="upper left", fontsize=ticks_fontsize)
+        axes_list[-1].set_xlabel("Date", fontsize=axis_label_fontsize, weight="black")
+        figure.tight_layout()
+        buffer = BytesIO()
+        figure.savefig(buffer, format="jpg")
+        buffer.seek(0)
+        charts.append(buffer)
+    return charts
+
+
+@traced
 def plot_current_condition(response):
-    figure(figsize=(8, 1))
-    xticks([])
-    yticks([1], array([f"{response.condition_text.title()}"]), fontweight="bold")
-    image_response = get(rf"https:{response.condition_image}").content
-    img = Image.open(BytesIO(image_response))
-    imshow(img, extent=[-0.5, 0.5, 0.5, 1.5])
-    savefig("plots/Current_condition_plot.jpg", format="jpg")
-    close()
+    use_agg_backend()
+    from matplotlib.pyplot import figure, xticks, yticks, imshow
+    from numpy import array
+
+    img = fetch_icons([response.condition_image])[response.condition_image]
+    with pyplot_lock:
+        figure(figsize=(8, 1))
+        xticks([])
+        yticks([1], array([f"{response.condition_text.title()}"]), fontweight="bold")
+        imshow(img, extent=[-0.5, 0.5, 0.5, 1.5])
+        return save_plot()
+
+
+class Progress:
+    frames = ("   ", ".  ", ".. ", "...")
+
+    def __init__(self, mode=None, stream=None):
+        self.stream = stream or sys.stdout
+        if mode in (None, "auto"):
+            mode = "spinner" if self.stream.isatty() else "lines"
+        self.mode = mode
+        self.lock = Lock()
+        self.thread = None
+        self.stopped = Event()
+        self.started = perf_counter()
+        self.local = local()
+
+    @property
+    def stage(self):
+        return getattr(self.local, "stage", None)
+
+    @stage.setter
+    def stage(self, stage):
+        self.local.stage = stage
+
+    @contextmanager
+    def report(self, location, date=None):
+        previous = getattr(self.local, "report", None)
+        self.local.report = {"location": location}
+        if date is not None:
+            self.local.report["date"] = str(date)
+        try:
+            yield
+        finally:
+            self.local.report = previous
+
+    def start(self, stage):
+        self.stop()
+        self.stage = stage
+        if self.mode == "spinner":
+            self.stopped.clear()
+            self.thread = Thread(target=self.spin, args=(stage,), daemon=True)
+            self.thread.start()
+        elif self.mode == "lines":
+            self.emit("start", stage)
+
+    def done(self, message, color="green"):
+        self.stop()
+        if self.mode == "spinner":
+            from emoji import emojize
+
+            message = emojize(message)
+            with self.lock:
+                print(colored(message, color) if color else message, file=self.stream)
+        elif self.mode == "lines":
+            self.emit("done", re.sub(r":[a-z_]+:", "", message).strip())
+        self.stage = None
+
+    def newline(self):
+        if self.mode == "spinner":
+            print(file=self.stream)
+
+    def stop(self):
+        if self.thread is not None:
+            self.stopped.set()
+            self.thread.join()
+            self.thread = None
+            with self.lock:
+                print(f"{' ' * (len(self.stage) + 3)}\r", end="", file=self.stream)
+
+    def spin(self, stage):
+        frame = 0
+        while True:
+            with self.lock:
+                print(
+                    f"{colored(stage, 'green')}{self.frames[frame % 4]}\r",
+                    end="",
+                    file=self.stream,
+                    flush=True,
+                )
+            frame += 1
+            if self.stopped.wait(0.2):
+                break
+
+    def emit(self, event, message):
+        with self.lock:
+            print(
+                json.dumps(
+                    {
+                        "event": event,
+                        **(getattr(self.local, "report", None) or {}),
+                        "stage": self.stage,
+                        "message": message,
+                        "elapsed": round(perf_counter() - self.started, 3),
+                    }
+                ),
+                file=self.stream,
+                flush=True,
+            )
+
 
+progress = Progress(progress_mode)
+
+
+@traced
+def plot_graphs(day, extra_functions=()):
+    functions = chart_functions(extra_functions)
+    if render_workers > 1:
+        return plot_graphs_parallel(day, functions)
+    charts = []
+    for function in functions:
+        with tracer.span(function.__name__):
+            charts.append(function(day))
+    return charts
+
+
+def chart_functions(extra_functions=()):
+    return [
+        plot_hourly_weather,
+        plot_hourly_weather_legend,
+        plot_temperature,
+        plot_wind_speed,
+        plot_gust,
+        plot_pressure,
+        plot_chances,
+        plot_precipitation_snowfall,
+        plot_humidity_cloudcover,
+        plot_dewpoint,
+        plot_visibility,
+        *extra_functions,
+    ]
+
+
+def plot_graphs_parallel(day, functions):
+    fetch_icons(day.hourly["condition_image"].tolist())
+    pool = get_render_pool()
+    futures = [pool.submit(render_chart, function, day) for function in functions]
+    return [BytesIO(future.result()) for future in futures]
+
+
+def get_render_pool():
+    global render_pool
+    if render_pool is None:
+        with render_pool_lock:
+            if render_pool is None:
+                render_pool = ProcessPoolExecutor(
+                    max_workers=render_workers, mp_context=get_context("spawn")
+                )
+    return render_pool
+
+
+def render_chart(function, day):
+    return function(day).getvalue()
 
-def generate_animation(word, n):
-    animations = [f"{word}   ", f"{word}.", f"{word}..", f"{word}..."]
-    for i in range(n):
-        for animation in animations:
-            print(f"{animation}\r", end="")
-            sleep(0.2)
 
+def use_agg_backend():
+    import matplotlib
 
-def plot_graphs(day):
-    plot_hourly_weather(day)
-    plot_hourly_weather_legend(day)
-    plot_temperature(day)
-    plot_wind_speed(day)
-    plot_gust(day)
-    plot_pressure(day)
-    plot_chances(day)
-    plot_precipitation_snowfall(day)
-    plot_humidity_cloudcover(day)
-    plot_dewpoint(day)
-    plot_visibility(day)
+    matplotlib.use("Agg")
+
+
+def save_plot():
+    use_agg_backend()
+    from matplotlib.pyplot import savefig, close
+
+    buffer = BytesIO()
+    savefig(buffer, format="jpg")
+    close()
+    buffer.seek(0)
+    return buffer
 
 
 (
@@ -796,634 +3062,282 @@ def plot_graphs(day):
 ) = (18, 10, 20, 16, 14, 12, 50)
 
 
-def plot_uv(day):
-    figure(figsize=(figure_width, figure_height))
-    title(
-        f"Ultra-Violet records for {day.name}, {day.country}\nDate: {day.date}",
-        fontsize=title_fontsize,
-        weight="black",
-    )
-    xlabel("Hour of the day", fontsize=axis_label_fontsize, weight="black")
-    ylabel("UV", fontsize=axis_label_fontsize, weight="black")
-    x_axis = array([time for time in generate_time_axis()])
-    xticks(rotation=rotation_value, fontsize=ticks_fontsize)
-    y_axis_pres = array(
-        [int(day.hourly_reports[hour]["uv"]) for hour in day.hourly_reports]
-    )
-    tick_params(axis="y", labelsize=ticks_fontsize)
-    ylim(bottom=min(y_axis_pres) - 0.5, top=max(y_axis_pres) + 0.5)
-    plot(x_axis, y_axis_pres, marker="o", linestyle="-", color="#bf2feb")
-    for point in range(24):
-        text(
-            point,
-            y_axis_pres[point] + 0.1,
-            f"{y_axis_pres[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
+chart_specs = {
+    "uv": {
+        "title": "Ultra-Violet records for {name}, {country}\nDate: {date}",
+        "panels": [("uv", "UV", "#bf2feb", 0.1, 0.5)],
+    },
+    "uv_aqi": {
+        "title": "Ultra-Violet and Air Quality Index records for {name}, {country}\nDate: {date}",
+        "panels": [
+            ("uv", "UV", "#bf2feb", 0.25, 1),
+            ("aqi_index", "AQI Index (UK Defra Index)", "green", 0.25, 1),
+        ],
+        "xticks_fontsizes": (ticks_fontsize, axis_label_fontsize),
+    },
+    "gust": {
+        "title": "Gust records for {name}, {country}\nDate: {date}",
+        "panels": [
+            ("gust_kph", "Gust (kph)", "grey", 0.5, 2),
+            ("gust_mph", "Gust (mph)", "grey", 0.5, 2),
+        ],
+    },
+    "visibility": {
+        "title": "Visibility records for {name}, {country}\nDate: {date}",
+        "panels": [
+            ("vis_km", "Visibility (km)", "grey", 0.5, 2),
+            ("vis_miles", "Visibility (miles)", "grey", 0.5, 2),
+        ],
+    },
+    "chances": {
+        "title": "Chance of rain and snow for {name}, {country}\nDate: {date}",
+        "panels": [
+            ("chance_of_rain", "Chance of rain (%)", "#2fbceb", 0.2, 1),
+            ("chance_of_snow", "Chance of snow (%)", "#cbecf2", 0.2, 1),
+        ],
+    },
+    "temperature": {
+        "title": "Temperature records for {name}, {country}\nDate: {date}",
+        "panels": [
+            ("temp_c", "Temperature (°C)", "r", 0.5, 2),
+            ("temp_f", "Temperature (°F)", "r", 0.5, 2),
+        ],
+    },
+    "dewpoint": {
+        "title": "Dewpoint records for {name}, {country}\nDate: {date}",
+        "panels": [
+            ("dewpoint_c", "Dewpoint (°C)", "#91eafa", 0.5, 2),
+            ("dewpoint_f", "Dewpoint (°F)", "#91eafa", 0.5, 2),
+        ],
+    },
+    "humidity_cloudcover": {
+        "title": "Humidity and Cloud Cover records for {name}, {country}\nDate: {date}",
+        "panels": [
+            ("humidity_percentage", "Humidity (%)", "#5ad1e6", 0.5, 4),
+            ("cloud_cover_percentage", "Cloud Cover (%)", "#5ad1e6", 0.05, 6.5),
+        ],
+    },
+    "pressure": {
+        "title": "Pressure records for {name}, {country}\nDate: {date}",
+        "panels": [("pressure_mb", "Pressure (mb)", "grey", 0.1, 0.5)],
+    },
+    "precipitation_snowfall": {
+        "title": "Precipitation and Snowfall records for {name}, {country}\nDate: {date}",
+        "panels": [
+            ("precip_mm", "Precipitation (mm)", "#2fbceb", 0.1, 1),
+            ("snow_cm", "Snowfall (cm)", "#d3e0e8", 0.1, 1),
+        ],
+    },
+    "wind_speed": {
+        "title": "Wind Speed records for {name}, {country}\nDate:{date}",
+        "panels": [
+            ("wind_kph", "Wind Speed (kph)", "#4293f5", 0.5, 2),
+            ("wind_mph", "Wind Speed (mph)", "#4293f5", 0.5, 2),
+        ],
+        "size": (figure_width + 1, figure_height + 1),
+        "rotation": rotation_value + 40,
+        "wind_directions": True,
+    },
+}
+chart_templates = {}
+
+
+class ChartTemplate:
+    def __init__(self, spec):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        self.spec = spec
+        self.lock = Lock()
+        self.time_axis = list(generate_time_axis())
+        self.figure = Figure(figsize=spec.get("size", (figure_width, figure_height)))
+        FigureCanvasAgg(self.figure)
+        self.panels = []
+        if len(spec["panels"]) == 1:
+            self.build_single()
+        else:
+            self.build_stacked()
+
+    def build_single(self):
+        axes = self.figure.subplots()
+        self.title = axes.set_title("", fontsize=title_fontsize, weight="black")
+        axes.set_xlabel("Hour of the day", fontsize=axis_label_fontsize, weight="black")
+        self.add_panel(axes, self.spec["panels"][0])
+
+    def build_stacked(self):
+        self.title = self.figure.suptitle("", fontsize=title_fontsize, weight="black")
+        for axes, panel in zip(
+            self.figure.subplots(len(self.spec["panels"]), 1), self.spec["panels"]
+        ):
+            self.add_panel(axes, panel)
+        self.panels[-1][0].set_xlabel(
+            "Hour of the Day", fontsize=axis_label_fontsize, weight="black"
         )
-    savefig(rf"plots/UV_plot_{day.date}.jpg", format="jpg")
-    close()
 
+    def add_panel(self, axes, panel):
+        metric, label, color, offset, margin = panel
+        (line,) = axes.plot(range(24), [0] * 24, marker="o", linestyle="-", color=color)
+        axes.set_ylabel(label, fontsize=axis_label_fontsize, weight="black")
+        axes.set_xticks(range(24))
+        fontsize = self.spec.get("xticks_fontsizes", (ticks_fontsize,) * 2)[
+            len(self.panels)
+        ]
+        self.set_time_labels(axes, self.time_axis, fontsize)
+        axes.tick_params(axis="y", labelsize=ticks_fontsize)
+        texts = [
+            axes.text(
+                point,
+                0,
+                "",
+                ha="center",
+                va="bottom",
+                weight="extra bold",
+                fontsize=point_text_fontsize,
+            )
+            for point in range(24)
+        ]
+        self.panels.append((axes, line, texts, panel, fontsize))
 
-def plot_uv_aqi(day):
-    fig, (plot_1, plot_2) = subplots(2, 1)
-    fig.suptitle(
-        f"Ultra-Violet and Air Quality Index records for {day.name}, {day.country}\nDate: {day.date}",
-        fontsize=title_fontsize,
-        weight="black",
-    )
-    fig.set_size_inches(figure_width, figure_height)
-    x_axis = array([time for time in generate_time_axis()])
-    y_axis_u = array([day.hourly_reports[hour]["uv"] for hour in day.hourly_reports])
-    plot_1.plot(x_axis, y_axis_u, marker="o", linestyle="-", color="#bf2feb")
-    plot_1.set_ylabel("UV", fontsize=axis_label_fontsize, weight="black")
-    plot_1.set_xticks(range(24))
-    plot_1.set_xticklabels(
-        plot_1.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_1.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_1.set_ylim(top=max(y_axis_u) + 1)
-    for point in range(24):
-        plot_1.text(
-            point,
-            y_axis_u[point] + 0.25,
-            f"{y_axis_u[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    y_axis_a = array(
-        [day.hourly_reports[hour]["aqi_index"] for hour in day.hourly_reports]
-    )
-    plot_2.plot(x_axis, y_axis_a, marker="o", linestyle="-", color="green")
-    plot_2.set_xlabel("Hour of the Day", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_ylabel(
-        "AQI Index (UK Defra Index)", fontsize=axis_label_fontsize, weight="black"
-    )
-    plot_2.set_xticks(range(24))
-    plot_2.set_xticklabels(
-        plot_2.get_xticklabels(), rotation=rotation_value, fontsize=axis_label_fontsize
-    )
-    plot_2.set_ylim(top=max(y_axis_a) + 1)
-    plot_2.tick_params(axis="y", labelsize=ticks_fontsize)
-    for point in range(24):
-        plot_2.text(
-            point,
-            y_axis_a[point] + 0.25,
-            f"{y_axis_a[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
+    def set_time_labels(self, axes, labels, fontsize):
+        axes.set_xticklabels(
+            labels,
+            rotation=self.spec.get("rotation", rotation_value),
+            fontsize=fontsize,
         )
-    savefig(rf"plots/UV_AQI_plot_{day.date}.jpg", format="jpg")
-    close()
+
+    def render(self, day):
+        with self.lock:
+            self.title.set_text(
+                self.spec["title"].format(
+                    name=day.name, country=day.country, date=day.date
+                )
+            )
+            for panel in self.panels:
+                self.update_panel(day, *panel)
+            buffer = BytesIO()
+            self.figure.savefig(buffer, format="jpg")
+        buffer.seek(0)
+        return buffer
+
+    def update_panel(self, day, axes, line, texts, panel, fontsize):
+        metric, label, color, offset, margin = panel
+        values = day.hourly[metric]
+        if len(self.panels) == 1:
+            values = values.astype(int)
+        line.set_ydata(values)
+        if len(self.panels) == 1:
+            axes.set_ylim(bottom=min(values) - margin, top=max(values) + margin)
+        else:
+            axes.relim()
+            axes.set_autoscaley_on(True)
+            axes.autoscale_view(scalex=False)
+            axes.set_ylim(top=max(values) + margin)
+        for point, text in enumerate(texts):
+            text.set_position((point, values[point] + offset))
+            text.set_text(f"{values[point]}")
+        if self.spec.get("wind_directions"):
+            self.set_time_labels(
+                axes,
+                [
+                    f"{time}\n({wind_dir})"
+                    for time, wind_dir in zip(self.time_axis, day.hourly["wind_dir"])
+                ],
+                fontsize,
+            )
+
+
+def render_template(name, day):
+    template = chart_templates.get(name)
+    if template is None:
+        template = chart_templates.setdefault(name, ChartTemplate(chart_specs[name]))
+    return template.render(day)
+
+
+def plot_uv(day):
+    return render_template("uv", day)
+
+
+def plot_uv_aqi(day):
+    return render_template("uv_aqi", day)
 
 
 def plot_gust(day):
-    fig, (plot_1, plot_2) = subplots(2, 1)
-    fig.suptitle(
-        f"Gust records for {day.name}, {day.country}\nDate: {day.date}",
-        fontsize=title_fontsize,
-        weight="black",
-    )
-    fig.set_size_inches(figure_width, figure_height)
-    x_axis = array([time for time in generate_time_axis()])
-    y_axis_k = array(
-        [day.hourly_reports[hour]["gust_kph"] for hour in day.hourly_reports]
-    )
-    plot_1.plot(x_axis, y_axis_k, marker="o", linestyle="-", color="grey")
-    plot_1.set_ylabel("Gust (kph)", fontsize=axis_label_fontsize, weight="black")
-    plot_1.set_xticks(range(24))
-    plot_1.set_xticklabels(
-        plot_1.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_1.set_ylim(top=max(y_axis_k) + 2)
-    plot_1.tick_params(axis="y", labelsize=ticks_fontsize)
-    for point in range(24):
-        plot_1.text(
-            point,
-            y_axis_k[point] + 0.5,
-            f"{y_axis_k[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    y_axis_m = array(
-        [day.hourly_reports[hour]["gust_mph"] for hour in day.hourly_reports]
-    )
-    plot_2.plot(x_axis, y_axis_m, marker="o", linestyle="-", color="grey")
-    plot_2.set_xlabel("Hour of the Day", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_ylabel("Gust (mph)", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_xticks(range(24))
-    plot_2.set_xticklabels(
-        plot_2.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_2.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_2.set_ylim(top=max(y_axis_m) + 2)
-    for point in range(24):
-        plot_2.text(
-            point,
-            y_axis_m[point] + 0.5,
-            f"{y_axis_m[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    savefig(rf"plots/Gust_plot_{day.date}.jpg", format="jpg")
-    close()
+    return render_template("gust", day)
 
 
 def plot_visibility(day):
-    fig, (plot_1, plot_2) = subplots(2, 1)
-    fig.suptitle(
-        f"Visibility records for {day.name}, {day.country}\nDate: {day.date}",
-        fontsize=title_fontsize,
-        weight="black",
-    )
-    fig.set_size_inches(figure_width, figure_height)
-    x_axis = array([time for time in generate_time_axis()])
-    y_axis_k = array(
-        [day.hourly_reports[hour]["vis_km"] for hour in day.hourly_reports]
-    )
-    plot_1.plot(x_axis, y_axis_k, marker="o", linestyle="-", color="grey")
-    plot_1.set_ylabel("Visibility (km)", fontsize=axis_label_fontsize, weight="black")
-    plot_1.set_xticks(range(24))
-    plot_1.set_xticklabels(
-        plot_1.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_1.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_1.set_ylim(top=max(y_axis_k) + 2)
-    for point in range(24):
-        plot_1.text(
-            point,
-            y_axis_k[point] + 0.5,
-            f"{y_axis_k[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    y_axis_m = array(
-        [day.hourly_reports[hour]["vis_miles"] for hour in day.hourly_reports]
-    )
-    plot_2.plot(x_axis, y_axis_m, marker="o", linestyle="-", color="grey")
-    plot_2.set_xlabel("Hour of the Day", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_ylabel(
-        "Visibility (miles)", fontsize=axis_label_fontsize, weight="black"
-    )
-    plot_2.set_xticks(range(24))
-    plot_2.set_xticklabels(
-        plot_2.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_2.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_2.set_ylim(top=max(y_axis_m) + 2)
-    for point in range(24):
-        plot_2.text(
-            point,
-            y_axis_m[point] + 0.5,
-            f"{y_axis_m[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    savefig(rf"plots/Visibility_plot_{day.date}.jpg", format="jpg")
-    close()
+    return render_template("visibility", day)
 
 
 def plot_chances(day):
-    fig, (plot_1, plot_2) = subplots(2, 1)
-    fig.suptitle(
-        f"Chance of rain and snow for {day.name}, {day.country}\nDate: {day.date}",
-        fontsize=title_fontsize,
-        weight="black",
-    )
-    fig.set_size_inches(figure_width, figure_height)
-    x_axis = array([time for time in generate_time_axis()])
-    y_axis_r = array(
-        [day.hourly_reports[hour]["chance_of_rain"] for hour in day.hourly_reports]
-    )
-    plot_1.plot(x_axis, y_axis_r, marker="o", linestyle="-", color="#2fbceb")
-    plot_1.set_ylabel(
-        "Chance of rain (%)", fontsize=axis_label_fontsize, weight="black"
-    )
-    plot_1.set_xticks(range(24))
-    plot_1.set_xticklabels(
-        plot_1.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_1.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_1.set_ylim(top=max(y_axis_r) + 1)
-    for point in range(24):
-        plot_1.text(
-            point,
-            y_axis_r[point] + 0.2,
-            f"{y_axis_r[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    y_axis_s = array(
-        [day.hourly_reports[hour]["chance_of_snow"] for hour in day.hourly_reports]
-    )
-    plot_2.plot(x_axis, y_axis_s, marker="o", linestyle="-", color="#cbecf2")
-    plot_2.set_xlabel("Hour of the Day", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_ylabel(
-        "Chance of snow (%)", fontsize=axis_label_fontsize, weight="black"
-    )
-    plot_2.set_xticks(range(24))
-    plot_2.set_xticklabels(
-        plot_2.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_2.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_2.set_ylim(top=max(y_axis_s) + 1)
-    for point in range(24):
-        plot_2.text(
-            point,
-            y_axis_s[point] + 0.2,
-            f"{y_axis_s[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    savefig(rf"plots/Chance_plot_{day.date}.jpg", format="jpg")
-    close()
+    return render_template("chances", day)
 
 
 def plot_temperature(day):
-    fig, (plot_1, plot_2) = subplots(2, 1)
-    fig.suptitle(
-        f"Temperature records for {day.name}, {day.country}\nDate: {day.date}",
-        fontsize=title_fontsize,
-        weight="black",
-    )
-    fig.set_size_inches(figure_width, figure_height)
-    x_axis = array([time for time in generate_time_axis()])
-    y_axis_c = array(
-        [day.hourly_reports[hour]["temp_c"] for hour in day.hourly_reports]
-    )
-    plot_1.plot(x_axis, y_axis_c, marker="o", linestyle="-", color="r")
-    plot_1.set_ylabel("Temperature (°C)", fontsize=axis_label_fontsize, weight="black")
-    plot_1.set_xticks(range(24))
-    plot_1.set_xticklabels(
-        plot_1.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_1.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_1.set_ylim(top=max(y_axis_c) + 2)
-    for point in range(24):
-        plot_1.text(
-            point,
-            y_axis_c[point] + 0.5,
-            f"{y_axis_c[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    y_axis_f = array(
-        [day.hourly_reports[hour]["temp_f"] for hour in day.hourly_reports]
-    )
-    plot_2.plot(x_axis, y_axis_f, marker="o", linestyle="-", color="r")
-    plot_2.set_xlabel("Hour of the Day", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_ylabel("Temperature (°F)", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_xticks(range(24))
-    plot_2.set_xticklabels(
-        plot_2.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_2.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_2.set_ylim(top=max(y_axis_f) + 2)
-    for point in range(24):
-        plot_2.text(
-            point,
-            y_axis_f[point] + 0.5,
-            f"{y_axis_f[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    savefig(rf"plots/Temperature_plot_{day.date}.jpg", format="jpg")
-    close()
+    return render_template("temperature", day)
 
 
 def plot_dewpoint(day):
-    fig, (plot_1, plot_2) = subplots(2, 1)
-    fig.suptitle(
-        f"Dewpoint records for {day.name}, {day.country}\nDate: {day.date}",
-        fontsize=title_fontsize,
-        weight="black",
-    )
-    fig.set_size_inches(figure_width, figure_height)
-    x_axis = array([time for time in generate_time_axis()])
-    y_axis_c = array(
-        [day.hourly_reports[hour]["dewpoint_c"] for hour in day.hourly_reports]
-    )
-    plot_1.plot(x_axis, y_axis_c, marker="o", linestyle="-", color="#91eafa")
-    plot_1.set_ylabel("Dewpoint (°C)", fontsize=axis_label_fontsize, weight="black")
-    plot_1.set_xticks(range(24))
-    plot_1.set_xticklabels(
-        plot_1.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_1.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_1.set_ylim(top=max(y_axis_c) + 2)
-    for point in range(24):
-        plot_1.text(
-            point,
-            y_axis_c[point] + 0.5,
-            f"{y_axis_c[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    y_axis_f = array(
-        [day.hourly_reports[hour]["dewpoint_f"] for hour in day.hourly_reports]
-    )
-    plot_2.plot(x_axis, y_axis_f, marker="o", linestyle="-", color="#91eafa")
-    plot_2.set_xlabel("Hour of the Day", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_ylabel("Dewpoint (°F)", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_xticks(range(24))
-    plot_2.set_xticklabels(
-        plot_2.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_2.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_2.set_ylim(top=max(y_axis_f) + 2)
-    for point in range(24):
-        plot_2.text(
-            point,
-            y_axis_f[point] + 0.5,
-            f"{y_axis_f[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    savefig(rf"plots/Dewpoint_plot_{day.date}.jpg", format="jpg")
-    close()
+    return render_template("dewpoint", day)
 
 
 def plot_humidity_cloudcover(day):
-    fig, (plot_1, plot_2) = subplots(2, 1)
-    fig.suptitle(
-        f"Humidity and Cloud Cover records for {day.name}, {day.country}\nDate: {day.date}",
-        fontsize=title_fontsize,
-        weight="black",
-    )
-    fig.set_size_inches(figure_width, figure_height)
-    x_axis = array([time for time in generate_time_axis()])
-    y_axis_hum = array(
-        [day.hourly_reports[hour]["humidity_percentage"] for hour in day.hourly_reports]
-    )
-    plot_1.plot(x_axis, y_axis_hum, marker="o", linestyle="-", color="#5ad1e6")
-    plot_1.set_ylabel("Humidity (%)", fontsize=axis_label_fontsize, weight="black")
-    plot_1.set_xticks(range(24))
-    plot_1.set_xticklabels(
-        plot_1.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_1.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_1.set_ylim(top=max(y_axis_hum) + 4)
-    for point in range(24):
-        plot_1.text(
-            point,
-            y_axis_hum[point] + 0.5,
-            f"{y_axis_hum[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    y_axis_cloud = array(
-        [
-            day.hourly_reports[hour]["cloud_cover_percentage"]
-            for hour in day.hourly_reports
-        ]
-    )
-    plot_2.plot(x_axis, y_axis_cloud, marker="o", linestyle="-", color="#5ad1e6")
-    plot_2.set_xlabel("Hour of the Day", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_ylabel("Cloud Cover (%)", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_xticks(range(24))
-    plot_2.set_xticklabels(
-        plot_2.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_2.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_2.set_ylim(top=max(y_axis_cloud) + 6.5)
-    for point in range(24):
-        plot_2.text(
-            point,
-            y_axis_cloud[point] + 0.05,
-            f"{y_axis_cloud[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    savefig(rf"plots/Humidity_CloudCover_plot_{day.date}.jpg", format="jpg")
-    close()
+    return render_template("humidity_cloudcover", day)
 
 
 def plot_pressure(day):
-    figure(figsize=(figure_width, figure_height))
-    title(
-        f"Pressure records for {day.name}, {day.country}\nDate: {day.date}",
-        fontsize=title_fontsize,
-        weight="black",
-    )
-    xlabel("Hour of the day", fontsize=axis_label_fontsize, weight="black")
-    ylabel("Pressure (mb)", fontsize=axis_label_fontsize, weight="black")
-    x_axis = array([time for time in generate_time_axis()])
-    xticks(rotation=rotation_value, fontsize=ticks_fontsize)
-    y_axis_pres = array(
-        [int(day.hourly_reports[hour]["pressure_mb"]) for hour in day.hourly_reports]
-    )
-    tick_params(axis="y", labelsize=ticks_fontsize)
-    ylim(bottom=min(y_axis_pres) - 0.5, top=max(y_axis_pres) + 0.5)
-    plot(x_axis, y_axis_pres, marker="o", linestyle="-", color="grey")
-    for point in range(24):
-        text(
-            point,
-            y_axis_pres[point] + 0.1,
-            f"{y_axis_pres[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    savefig(rf"plots/Pressure_plot_{day.date}.jpg", format="jpg")
-    close()
+    return render_template("pressure", day)
 
 
 def plot_precipitation_snowfall(day):
-    fig, (plot_1, plot_2) = subplots(2, 1)
-    fig.suptitle(
-        f"Precipitation and Snowfall records for {day.name}, {day.country}\nDate: {day.date}",
-        fontsize=title_fontsize,
-        weight="black",
-    )
-    fig.set_size_inches(figure_width, figure_height)
-    x_axis = array([time for time in generate_time_axis()])
-    y_axis_prec = array(
-        [day.hourly_reports[hour]["precip_mm"] for hour in day.hourly_reports]
-    )
-    plot_1.plot(x_axis, y_axis_prec, marker="o", linestyle="-", color="#2fbceb")
-    plot_1.set_ylabel(
-        "Precipitation (mm)", fontsize=axis_label_fontsize, weight="black"
-    )
-    plot_1.set_xticks(range(24))
-    plot_1.set_xticklabels(
-        plot_1.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_1.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_1.set_ylim(top=max(y_axis_prec) + 1)
-    for point in range(24):
-        plot_1.text(
-            point,
-            y_axis_prec[point] + 0.1,
-            f"{y_axis_prec[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    y_axis_snow = array(
-        [day.hourly_reports[hour]["snow_cm"] for hour in day.hourly_reports]
-    )
-    plot_2.plot(x_axis, y_axis_snow, marker="o", linestyle="-", color="#d3e0e8")
-    plot_2.set_xlabel("Hour of the Day", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_ylabel("Snowfall (cm)", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_xticks(range(24))
-    plot_2.set_xticklabels(
-        plot_2.get_xticklabels(), rotation=rotation_value, fontsize=ticks_fontsize
-    )
-    plot_2.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_2.set_ylim(top=max(y_axis_snow) + 1)
-    for point in range(24):
-        plot_2.text(
-            point,
-            y_axis_snow[point] + 0.1,
-            f"{y_axis_snow[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    savefig(rf"plots/Precipitation_Snowfall_plot_{day.date}.jpg", format="jpg")
-    close()
+    return render_template("precipitation_snowfall", day)
 
 
 def plot_wind_speed(day):
-    fig, (plot_1, plot_2) = subplots(2, 1)
-    fig.suptitle(
-        f"Wind Speed records for {day.name}, {day.country}\nDate:{day.date}",
-        fontsize=title_fontsize,
-        weight="black",
-    )
-    fig.set_size_inches(figure_width + 1, figure_height + 1)
-    x_axis = array(
-        [
-            f"{item[0]}\n({day.hourly_reports[item[1]]["wind_dir"]})"
-            for item in zip(generate_time_axis(), day.hourly_reports)
-        ]
-    )
-    y_axis_k = array(
-        [day.hourly_reports[hour]["wind_kph"] for hour in day.hourly_reports]
-    )
-    plot_1.plot(x_axis, y_axis_k, marker="o", linestyle="-", color="#4293f5")
-    plot_1.set_ylabel("Wind Speed (kph)", fontsize=axis_label_fontsize, weight="black")
-    plot_1.set_xticks(range(24))
-    plot_1.set_xticklabels(
-        plot_1.get_xticklabels(), rotation=rotation_value + 40, fontsize=ticks_fontsize
-    )
-    plot_1.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_1.set_ylim(top=max(y_axis_k) + 2)
-    for point in range(24):
-        plot_1.text(
-            point,
-            y_axis_k[point] + 0.5,
-            f"{y_axis_k[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    y_axis_m = array(
-        [day.hourly_reports[hour]["wind_mph"] for hour in day.hourly_reports]
-    )
-    plot_2.plot(x_axis, y_axis_m, marker="o", linestyle="-", color="#4293f5")
-    plot_2.set_xlabel("Hour of the Day", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_ylabel("Wind Speed (mph)", fontsize=axis_label_fontsize, weight="black")
-    plot_2.set_xticks(range(24))
-    plot_2.set_xticklabels(
-        plot_2.get_xticklabels(), rotation=rotation_value + 40, fontsize=ticks_fontsize
-    )
-    plot_2.tick_params(axis="y", labelsize=ticks_fontsize)
-    plot_2.set_ylim(top=max(y_axis_m) + 2)
-    for point in range(24):
-        plot_2.text(
-            point,
-            y_axis_m[point] + 0.5,
-            f"{y_axis_m[point]}",
-            ha="center",
-            va="bottom",
-            weight="extra bold",
-            fontsize=point_text_fontsize,
-        )
-    savefig(rf"plots/Wind_Speed_plot_{day.date}.jpg", format="jpg")
-    close()
+    return render_template("wind_speed", day)
 
 
 def plot_hourly_weather(day):
-    figure(figsize=(8, 1.5))
-    title(
-        f"Hourly weather for {day.name}, {day.country}\nDate: {day.date}",
-        weight="black",
-    )
-    x_axis = array([time for time in generate_time_axis()])
-    xticks(range(24), x_axis, rotation=rotation_value)
-    yticks([])
-    y_axis_images = array(
-        [day.hourly_reports[hour]["condition_image"] for hour in day.hourly_reports]
-    )
-    images = []
-    for link in range(len(y_axis_images)):
-        icon = get(f"https:{y_axis_images[link]}").content
-        icon = Image.open(BytesIO(icon))
-        images.append(icon)
-    for position, img in enumerate(images):
-        imshow(img, extent=[position - 0.5, position + 0.5, 0, 1])
-    xlim(left=-1, right=24)
-    savefig(rf"plots/Hourwise_Weather_plot_{day.date}.jpg", format="jpg")
-    close()
+    use_agg_backend()
+    from matplotlib.pyplot import figure, title, xticks, yticks, imshow, xlim
+    from numpy import array
+
+    y_axis_images = day.hourly["condition_image"].tolist()
+    icons = fetch_icons(y_axis_images)
+    with pyplot_lock:
+        figure(figsize=(8, 1.5))
+        title(
+            f"Hourly weather for {day.name}, {day.country}\nDate: {day.date}",
+            weight="black",
+        )
+        x_axis = array([time for time in generate_time_axis()])
+        xticks(range(24), x_axis, rotation=rotation_value)
+        yticks([])
+        for position, link in enumerate(y_axis_images):
+            imshow(icons[link], extent=[position - 0.5, position + 0.5, 0, 1])
+        xlim(left=-1, right=24)
+        return save_plot()
 
 
 def plot_hourly_weather_legend(day):
-    figure(figsize=(7, 1.5))
-    xticks([])
-    y_axis_images = [
-        day.hourly_reports[hour]["condition_image"] for hour in day.hourly_reports
-    ]
-    y_axis_text = [
-        day.hourly_reports[hour]["condition_text"].title()
-        for hour in day.hourly_reports
-    ]
+    use_agg_backend()
+    from matplotlib.pyplot import figure, xticks, yticks, imshow, ylim
+    from numpy import array
+
+    y_axis_images = day.hourly["condition_image"].tolist()
+    y_axis_text = [text.title() for text in day.hourly["condition_text"]]
     y_axis_group = dict(zip(y_axis_text, y_axis_images))
-    yticks(range(len(y_axis_group)), array([label for label in y_axis_group]))
-    images = []
-    for text in y_axis_group:
-        icon = get(f"https:{y_axis_group[text]}").content
-        icon = Image.open(BytesIO(icon))
-        images.append(icon)
-    for position, img in enumerate(images):
-        imshow(img, extent=[-1, 1, position - 1, position + 1])
-    ylim(bottom=-1, top=len(y_axis_group))
-    savefig(rf"plots/Hourwise_Weather_legend_plot_{day.date}.jpg", format="jpg")
-    close()
+    icons = fetch_icons(y_axis_group.values())
+    with pyplot_lock:
+        figure(figsize=(7, 1.5))
+        xticks([])
+        yticks(range(len(y_axis_group)), array([label for label in y_axis_group]))
+        for position, text in enumerate(y_axis_group):
+            imshow(
+                icons[y_axis_group[text]], extent=[-1, 1, position - 1, position + 1]
+            )
+        ylim(bottom=-1, top=len(y_axis_group))
+        return save_plot()
 
 
 def generate_time_axis():
@@ -1,5 +1,59 @@
-from pytest import raises
-from project import prompt_parse_and_run, extract_date, verify_date, verify_location
+import datetime
+import subprocess
+import sys
+from types import SimpleNamespace
+import json
+import tracemalloc
+import threading
+from urllib.request import urlopen
+from urllib.error import HTTPError
+from http.server import ThreadingHTTPServer
+import os
+import time
+import project
+from io import BytesIO, StringIO
+from PIL import Image
+from pytest import raises, fixture
+from project import (
+    prompt_parse_and_run,
+    extract_date,
+    verify_date,
+    verify_location,
+    plan_requests,
+    generate_history_windows,
+    fetch_all,
+    HttpClient,
+    ResponseCache,
+    fetch_range,
+    IconStore,
+    warm_icon_pack,
+    generate_pdf,
+    plot_graphs,
+    plot_uv_aqi,
+    Day,
+    ChartTemplate,
+    chart_specs,
+    Progress,
+    ReportServer,
+    read_manifest,
+    run_batch,
+    JobQueue,
+    run_worker,
+    Tracer,
+    Metrics,
+    FixtureStore,
+    MockHandler,
+    benchmark_stage,
+    compare_benchmarks,
+    run_benchmarks,
+    plan_load,
+    run_load_test,
+    ObservationArchive,
+    compute_trend,
+    rolling,
+    downsample,
+    generate_trend_report,
+)
 
 def test_prompt_parse_and_run_incorrect_usage():
     with raises(SystemExit):
@@ -42,3 +96,898 @@ def test_verify_date_incorrect():
     assert verify_date(" ") == False
     assert verify_date("987") == False
 
+
+def test_plan_requests_single_forecast_call():
+    today = datetime.date(2025, 5, 7)
+    dates = [today + datetime.timedelta(days=day) for day in range(-2, 3)]
+    historical_dates, forecast_days = plan_requests(dates, today)
+    assert historical_dates == dates[:2]
+    assert forecast_days == 3
+
+def test_plan_requests_historical_only():
+    today = datetime.date(2025, 5, 7)
+    dates = [today - datetime.timedelta(days=day) for day in (3, 2, 1)]
+    assert plan_requests(dates, today) == (dates, 0)
+
+def test_generate_history_windows():
+    start = datetime.date(2025, 5, 1)
+    dates = [start + datetime.timedelta(days=day) for day in (0, 1, 2, 4, 5)]
+    assert list(generate_history_windows(dates)) == [dates[:3], dates[3:]]
+    assert list(generate_history_windows(dates[:3], max_days=2)) == [
+        dates[:2],
+        dates[2:3],
+    ]
+
+def test_fetch_all_concurrent_and_ordered(monkeypatch):
+    barrier = threading.Barrier(4, timeout=10)
+
+    def concurrent_get(url):
+        barrier.wait()
+        return url
+
+    monkeypatch.setattr(project.http_client, "get", concurrent_get)
+    assert fetch_all(["a", "b", "c", "d"], workers=4) == ["a", "b", "c", "d"]
+
+def test_fetch_all_limit_is_shared_across_calls(monkeypatch):
+    lock, active, peak = threading.Lock(), [0], [0]
+
+    def counting_get(url):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return url
+
+    monkeypatch.setattr(project.http_client, "get", counting_get)
+    monkeypatch.setattr(project, "request_slots", threading.BoundedSemaphore(2))
+    results = []
+    callers = [
+        threading.Thread(target=lambda: results.append(fetch_all(list("abcd"), workers=4)))
+        for caller in range(3)
+    ]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+    assert results == [list("abcd")] * 3
+    assert 1 <= peak[0] <= 2
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+        self.content = b""
+
+def test_http_client_retries_server_errors(monkeypatch):
+    client = HttpClient(retries=2)
+    statuses = iter([503, 429, 200])
+    monkeypatch.setattr(
+        client, "session", SimpleNamespace(get=lambda url, timeout: FakeResponse(next(statuses)))
+    )
+    monkeypatch.setattr(HttpClient, "backoff", staticmethod(lambda attempt, retry_after=None: 0))
+    assert client.get("https://example.com").status_code == 200
+    assert client.stats["requests"] == 3
+    assert client.stats["retries"] == 2
+    assert client.stats["failures"] == 2
+
+def test_http_client_backoff_bounds():
+    for attempt in range(10):
+        assert 0 <= HttpClient.backoff(attempt) <= 8
+    assert HttpClient.backoff(0, "2") == 2
+
+def test_response_cache_ttl_and_normalized_location(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    cache.put("history", "New  York", "2025-05-01:2025-05-03", {"a": 1})
+    cache.put("forecast", "Rome", "2025-05-07:3", {"b": 2}, ttl=-1)
+    assert cache.get("history", "new york", "2025-05-01:2025-05-03") == {"a": 1}
+    assert cache.get("forecast", "Rome", "2025-05-07:3") is None
+    assert cache.purge("history") == 1
+    assert cache.info() == {}
+
+def test_response_cache_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), max_bytes=600)
+    for day in range(1, 4):
+        cache.put("history", "Rome", f"2025-05-0{day}", {"hour": os.urandom(200).hex()})
+        cache.get("history", "Rome", "2025-05-01")
+    assert cache.get("history", "Rome", "2025-05-01") is not None
+    assert cache.get("history", "Rome", "2025-05-02") is None
+    cache.put("history", "Rome", "2025-05-04", {"hour": os.urandom(480).hex()})
+    assert cache.get("history", "Rome", "2025-05-04") is not None
+    assert cache.info()["history"]["entries"] == 1
+
+def test_fetch_range_served_from_cache(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    monkeypatch.setattr(project, "response_cache", cache)
+    today = datetime.date(2025, 5, 7)
+    dates = [today - datetime.timedelta(days=1), today]
+    history = {"forecast": {"forecastday": [{"date": "2025-05-06"}]}}
+    cache.put("history", "Rome", "2025-05-06:2025-05-06", history)
+    cache.put("forecast", "Rome", "2025-05-07:1", {"f": 1}, ttl=60)
+    monkeypatch.setattr(project, "fetch_all", lambda urls: [] if not urls else 1 / 0)
+    responses = fetch_range("Rome", dates, today)
+    assert responses[dates[0]] == (history, "historical")
+    assert responses[dates[1]] == ({"f": 1}, "current")
+
+class FakeIconResponse:
+    def __init__(self):
+        buffer = BytesIO()
+        Image.new("RGBA", (4, 4)).save(buffer, format="png")
+        self.content = buffer.getvalue()
+
+    def raise_for_status(self):
+        pass
+
+def test_icon_store_fetches_each_icon_once(tmp_path, monkeypatch):
+    fetched = []
+
+    def fake_fetch_all(urls):
+        fetched.extend(urls)
+        return [FakeIconResponse() for url in urls]
+
+    monkeypatch.setattr(project, "fetch_all", fake_fetch_all)
+    link = "//cdn.weatherapi.com/weather/64x64/day/113.png"
+    store = IconStore(str(tmp_path))
+    images = store.fetch([link] * 24)
+    assert list(images) == [link]
+    assert store.fetch([link])[link] is images[link]
+    assert IconStore(str(tmp_path)).fetch([link])[link].size == (4, 4)
+    assert fetched == [f"https:{link}"]
+    assert (tmp_path / "refs" / "weather" / "64x64" / "day" / "113.png").exists()
+
+def test_icon_store_is_content_addressed(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        project, "fetch_all", lambda urls: [FakeIconResponse() for url in urls]
+    )
+    links = [f"//cdn.weatherapi.com/weather/64x64/{period}/113.png" for period in ("day", "night")]
+    store = IconStore(str(tmp_path))
+    images = store.fetch(links)
+    assert images[links[0]] is images[links[1]]
+    assert len(list((tmp_path / "objects").iterdir())) == 1
+    next((tmp_path / "objects").iterdir()).write_bytes(b"changed")
+    assert IconStore(str(tmp_path)).load(links[0]) is None
+    assert IconStore(str(tmp_path)).fetch(links[:1])[links[0]].size == (4, 4)
+
+def test_warm_icon_pack_and_offline_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        project, "fetch_all", lambda urls: [FakeIconResponse() for url in urls]
+    )
+    assert warm_icon_pack(str(tmp_path)) == (96, 96)
+    assert warm_icon_pack(str(tmp_path)) == (96, 0)
+    monkeypatch.setattr(project, "fetch_all", lambda urls: [] if not urls else 1 / 0)
+    store = IconStore(str(tmp_path), offline=True)
+    assert store.fetch(["//cdn.weatherapi.com/weather/64x64/night/395.png"])
+    with raises(FileNotFoundError):
+        store.fetch(["//cdn.weatherapi.com/weather/64x64/day/999.png"])
+
+
+def test_fetch_range_refetches_days_missing_from_a_window(tmp_path, monkeypatch):
+    monkeypatch.setattr(project, "response_cache", ResponseCache(str(tmp_path / "cache.sqlite3")))
+    monkeypatch.setattr(project, "progress", Progress("off"))
+    monkeypatch.setattr(project, "api_key", "test")
+    returned = {
+        "dt=2025-05-01&end_dt=2025-05-03": ["2025-05-01"],
+        "dt=2025-05-02&end_dt=2025-05-02": ["2025-05-02"],
+        "dt=2025-05-03&end_dt=2025-05-03": [],
+    }
+    requested = []
+
+    def fake_fetch_all(urls):
+        requested.extend(urls)
+        return [
+            SimpleNamespace(
+                status_code=200,
+                json=lambda days=next(days for key, days in returned.items() if key in url): {
+                    "forecast": {"forecastday": [{"date": day} for day in days]}
+                },
+            )
+            for url in urls
+        ]
+
+    monkeypatch.setattr(project, "fetch_all", fake_fetch_all)
+    dates = [datetime.date(2025, 5, day) for day in (1, 2, 3)]
+    responses = fetch_range("Rome", dates, datetime.date(2025, 5, 7))
+    assert len(requested) == 3
+    assert responses[dates[0]][0]["forecast"]["forecastday"] == [{"date": "2025-05-01"}]
+    assert responses[dates[1]][0]["forecast"]["forecastday"] == [{"date": "2025-05-02"}]
+    assert responses[dates[2]] == (
+        {"error": {"message": "No weather data returned for Rome on 2025-05-03."}},
+        "historical",
+    )
+
+
+def make_hour(date, hour):
+    return {
+        "time": f"{date} {hour:02d}:00",
+        "temp_c": 10.0 + hour / 2,
+        "temp_f": 50.0 + hour,
+        "is_day": int(6 <= hour < 18),
+        "condition": {
+            "text": "Sunny " if hour % 2 else "Partly cloudy ",
+            "icon": f"//cdn.weatherapi.com/weather/64x64/day/{113 + hour % 2 * 3}.png",
+        },
+        "wind_mph": 5.0 + hour % 4,
+        "wind_kph": 8.0 + hour % 4,
+        "wind_dir": "NNE",
+        "pressure_mb": 1012.0 + hour % 3,
+        "precip_mm": 0.1 * (hour % 5),
+        "snow_cm": 0.0,
+        "humidity": 60 + hour,
+        "cloud": 20 + hour,
+        "dewpoint_c": 5.0 + hour / 4,
+        "dewpoint_f": 41.0 + hour / 2,
+        "chance_of_rain": hour * 3,
+        "chance_of_snow": 0,
+        "vis_km": 10.0,
+        "vis_miles": 6.0,
+        "uv": hour % 7,
+        "gust_kph": 12.0 + hour % 6,
+        "gust_mph": 7.5 + hour % 6,
+        "air_quality": {"gb-defra-index": 1 + hour % 3},
+    }
+
+def make_air_quality():
+    return {
+        "co": 230.456,
+        "o3": 60.1,
+        "no2": 12.345,
+        "so2": 3.21,
+        "pm2_5": 8.765,
+        "pm10": 10.123,
+        "gb-defra-index": 2,
+    }
+
+def make_forecast_day(date):
+    return {
+        "date": date,
+        "day": {
+            "avgtemp_c": 16.0,
+            "avgtemp_f": 60.8,
+            "condition": {
+                "text": "Sunny",
+                "icon": "//cdn.weatherapi.com/weather/64x64/day/113.png",
+            },
+            "maxwind_mph": 9.0,
+            "maxwind_kph": 14.4,
+            "totalprecip_mm": 1.2,
+            "totalsnow_cm": 0.0,
+            "avghumidity": 70,
+            "avgvis_km": 10.0,
+            "avgvis_miles": 6.0,
+            "uv": 5.0,
+            "air_quality": make_air_quality(),
+        },
+        "astro": {
+            "sunrise": "05:45 AM",
+            "sunset": "08:10 PM",
+            "moonrise": "11:02 AM",
+            "moonset": "02:15 AM",
+            "moon_phase": "Waxing Gibbous",
+            "moon_illumination": 71,
+        },
+        "hour": [make_hour(date, hour) for hour in range(24)],
+    }
+
+def make_response(dates, current=True):
+    response = {
+        "location": {
+            "name": "Rome",
+            "country": "Italy",
+            "lat": 41.9,
+            "lon": 12.48,
+            "localtime": f"{dates[0]} 12:30",
+        },
+        "forecast": {"forecastday": [make_forecast_day(date) for date in dates]},
+    }
+    if current:
+        response["current"] = {
+            "last_updated": f"{dates[0]} 12:15",
+            "condition": {
+                "text": "Sunny",
+                "icon": "//cdn.weatherapi.com/weather/64x64/day/113.png",
+            },
+            "air_quality": make_air_quality(),
+        }
+        for key in (
+            "temp_c", "temp_f", "wind_mph", "wind_kph", "pressure_mb", "precip_mm",
+            "humidity", "cloud", "feelslike_c", "feelslike_f", "windchill_c",
+            "windchill_f", "heatindex_c", "heatindex_f", "dewpoint_c", "dewpoint_f",
+            "vis_km", "vis_miles", "uv", "gust_kph", "gust_mph",
+        ):
+            response["current"][key] = 12.5
+        response["current"]["wind_dir"] = "NNE"
+    return response
+
+@fixture
+def offline_pipeline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(project, "progress", Progress("off"))
+    monkeypatch.setattr(project, "icon_store", IconStore(str(tmp_path / "icons")))
+    monkeypatch.setattr(
+        project, "observation_archive", ObservationArchive(str(tmp_path / "archive.sqlite3"))
+    )
+    monkeypatch.setattr(
+        project, "fetch_all", lambda urls: [FakeIconResponse() for url in urls]
+    )
+    return tmp_path
+
+def test_generate_pdf_renders_in_memory(offline_pipeline):
+    response = make_response(["2025-05-07", "2025-05-08"])
+    generate_pdf(response, flag="current", date=datetime.date(2025, 5, 7))
+    generate_pdf(response, flag="forecast", date=datetime.date(2025, 5, 8))
+    generate_pdf(
+        make_response(["2025-05-01"], current=False),
+        flag="historical",
+        date=datetime.date(2025, 5, 1),
+    )
+    assert sorted(path.name for path in offline_pipeline.glob("*.pdf")) == [
+        "Weather_Report_Rome_2025-05-01.pdf",
+        "Weather_Report_Rome_2025-05-07.pdf",
+        "Weather_Report_Rome_2025-05-08.pdf",
+    ]
+    assert not (offline_pipeline / "plots").exists()
+
+def test_plot_graphs_parallel_matches_serial(offline_pipeline, monkeypatch):
+    monkeypatch.setenv("WEATHER_CACHE_DIR", str(offline_pipeline))
+    day = Day.generate_forecast_for_day("2025-05-07", make_response(["2025-05-07"]))
+    serial = [chart.getvalue() for chart in plot_graphs(day, [plot_uv_aqi])]
+    monkeypatch.setattr(project, "render_workers", 2)
+    monkeypatch.setattr(project, "render_pool", None)
+    try:
+        parallel = [chart.getvalue() for chart in plot_graphs(day, [plot_uv_aqi])]
+    finally:
+        project.render_pool.shutdown()
+    assert len(parallel) == 12
+    assert parallel == serial
+
+def test_render_pool_is_created_once_across_threads(monkeypatch):
+    created = []
+
+    class FakePool:
+        def __init__(self, **kwargs):
+            time.sleep(0.05)
+            created.append(self)
+
+    monkeypatch.setattr(project, "ProcessPoolExecutor", FakePool)
+    monkeypatch.setattr(project, "render_pool", None)
+    pools = []
+    threads = [threading.Thread(target=lambda: pools.append(project.get_render_pool())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1 and all(pool is created[0] for pool in pools)
+
+def test_chart_template_reuse_matches_fresh_render():
+    today = Day.generate_forecast_for_day("2025-05-07", make_response(["2025-05-07"]))
+    response = make_response(["2025-05-08"])
+    for hour in response["forecast"]["forecastday"][0]["hour"]:
+        hour["temp_c"] *= 3
+        hour["wind_dir"] = "SW"
+    tomorrow = Day.generate_forecast_for_day("2025-05-08", response)
+    for name in ("temperature", "wind_speed", "pressure"):
+        template = ChartTemplate(chart_specs[name])
+        template.render(today)
+        reused = template.render(tomorrow).getvalue()
+        assert reused == ChartTemplate(chart_specs[name]).render(tomorrow).getvalue()
+
+def test_forecast_day_hourly_columns():
+    day = Day.generate_forecast_for_day("2025-05-07", make_response(["2025-05-07"]))
+    assert list(day.hourly["hour"]) == list(range(24))
+    assert day.hourly["temp_c"].dtype.kind == "f"
+    assert day.hourly["humidity_percentage"].dtype.kind == "i"
+    assert day.hourly["condition_text"][0] == "Partly cloudy"
+    assert day.gust_kph == 17.0
+    assert day.pressure_mb == 1013.0
+    assert day.dewpoint_c == 7.88
+
+def test_index_days_parses_each_forecastday_once():
+    response = make_response(["2025-05-07", "2025-05-08", "2025-05-09"])
+    days = Day.index_days(response)
+    assert list(days) == ["2025-05-07", "2025-05-08", "2025-05-09"]
+    assert days["2025-05-08"].co == 230.46
+    current = Day.generate_current_report(response, days)
+    assert current.astro is days["2025-05-07"].astro
+    historical = Day.index_days(make_response(["2025-05-01"], current=False), aqi=False)
+    assert not hasattr(historical["2025-05-01"], "aqi_index")
+    assert "aqi_index" not in historical["2025-05-01"].hourly
+
+def test_day_memory_per_instance():
+    response = make_response(["2025-05-07"])
+    forecast_day = response["forecast"]["forecastday"][0]
+    tracemalloc.start()
+    days = [Day.from_forecast_day(forecast_day, response["location"]) for _ in range(200)]
+    per_day = tracemalloc.get_traced_memory()[0] / len(days)
+    tracemalloc.stop()
+    assert not hasattr(days[0], "__dict__")
+    assert not hasattr(days[0].hourly, "__dict__")
+    assert per_day < 10 * 1024
+
+def test_progress_lines_mode_never_blocks():
+    stream = StringIO()
+    progress = Progress("lines", stream=stream)
+    start = time.perf_counter()
+    progress.start("Requesting API")
+    progress.done("API Request received :desktop_computer:")
+    assert time.perf_counter() - start < 0.1
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [event["event"] for event in events] == ["start", "done"]
+    assert events[1]["stage"] == "Requesting API"
+    assert events[1]["message"] == "API Request received"
+
+def test_progress_lines_mode_attributes_events_per_thread():
+    stream = StringIO()
+    progress = Progress("lines", stream=stream)
+    barrier = threading.Barrier(2, timeout=10)
+
+    def report(place, date):
+        with progress.report(place, date):
+            progress.start(f"Rendering {place}")
+            barrier.wait()
+            progress.done("Rendered")
+
+    threads = [
+        threading.Thread(target=report, args=(place, "2025-05-07"))
+        for place in ("Rome", "Paris")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(events) == 4
+    for event in events:
+        assert event["stage"] == f"Rendering {event['location']}"
+        assert event["date"] == "2025-05-07"
+
+def test_progress_spinner_runs_on_its_own_thread():
+    stream = StringIO()
+    progress = Progress("spinner", stream=stream)
+    progress.start("Generating graphs")
+    time.sleep(0.5)
+    progress.done("Graphs generated :bar_chart:")
+    assert progress.thread is None
+    assert stream.getvalue().count("Generating graphs") >= 2
+    assert "Graphs generated" in stream.getvalue()
+
+def test_import_is_light_and_needs_no_key(tmp_path, record_property):
+    script = (
+        "import os, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import project\n"
+        "elapsed = time.perf_counter() - start\n"
+        "heavy = ['matplotlib', 'numpy', 'PIL', 'fpdf', 'requests', 'emoji']\n"
+        "loaded = [module for module in heavy if module in sys.modules]\n"
+        "assert project.verify_date('2025-05-07') and project.verify_location('Rome')\n"
+        "assert 'MPLBACKEND' not in os.environ\n"
+        "start = time.perf_counter()\n"
+        "import numpy, matplotlib.pyplot, fpdf, requests, PIL.Image\n"
+        "print(elapsed, time.perf_counter() - start, loaded)\n"
+    )
+    env = {**os.environ, "PYTHONPATH": os.path.dirname(os.path.abspath(project.__file__))}
+    env.pop("WEATHER_API_KEY", None)
+    env.pop("MPLBACKEND", None)
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=tmp_path, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    elapsed, heavy_elapsed, loaded = result.stdout.split(" ", 2)
+    record_property("import_seconds", float(elapsed))
+    record_property("heavy_import_seconds", float(heavy_elapsed))
+    assert loaded.strip() == "[]"
+    assert float(elapsed) < 0.4 * float(heavy_elapsed)
+    result = subprocess.run(
+        [sys.executable, project.__file__, "--help"], cwd=tmp_path, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0
+    assert result.stdout.startswith("Usage:")
+
+@fixture
+def report_server():
+    server = ReportServer(("127.0.0.1", 0), workers=1, queue_size=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_report_server_returns_pdf_and_errors(report_server, monkeypatch):
+    monkeypatch.setattr(
+        project, "generate_report", lambda place, date: (f"{place}.pdf", b"%PDF-1.4")
+    )
+    with urlopen(f"{report_server}/report?location=Rome&date=2025-05-07") as response:
+        assert response.headers["Content-Type"] == "application/pdf"
+        assert response.read() == b"%PDF-1.4"
+    monkeypatch.undo()
+    with raises(HTTPError) as error:
+        urlopen(f"{report_server}/report?location=987&date=2025-05-07")
+    assert error.value.code == 400
+    assert urlopen(f"{report_server}/health").read() == b"ok\n"
+    exposition = urlopen(f"{report_server}/metrics").read().decode()
+    assert 'weather_server_responses_total{status="400"}' in exposition
+
+def test_report_server_reports_a_missing_api_key(report_server, monkeypatch, tmp_path, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("WEATHER_API_KEY", raising=False)
+    monkeypatch.setattr(project, "api_key", None)
+    with raises(project.MissingApiKeyError):
+        project.get_api_key()
+    monkeypatch.setattr(project, "generate_report", lambda place, date: project.get_api_key())
+    with raises(HTTPError) as error:
+        urlopen(f"{report_server}/report?location=Rome&date=2025-05-07")
+    assert error.value.code == 503
+    assert error.value.read() == b"No API key configured on the server\n"
+    assert capsys.readouterr().err == ""
+
+def test_report_server_rejects_when_queue_is_full(report_server, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(
+        project, "generate_report", lambda place, date: release.wait() and ("a.pdf", b"")
+    )
+    first = threading.Thread(
+        target=urlopen, args=(f"{report_server}/report?location=Rome&date=2025-05-07",)
+    )
+    first.start()
+    time.sleep(0.3)
+    with raises(HTTPError) as error:
+        urlopen(f"{report_server}/report?location=Rome&date=2025-05-07")
+    assert error.value.code == 503
+    release.set()
+    first.join()
+
+def test_run_batch_deduplicates_and_groups_by_location(offline_pipeline, monkeypatch):
+    (offline_pipeline / "manifest.csv").write_text(
+        "location,start,end\nRome,2025-05-07,2025-05-08\n rome ,2025-05-08,\n987,2025-05-07,\n"
+    )
+    calls = []
+
+    def fake_fetch_range(place, dates, current_date):
+        calls.append((place, dates))
+        response = make_response([str(date) for date in dates])
+        return {date: (response, "forecast") for date in dates}
+
+    monkeypatch.setattr(project, "fetch_range", fake_fetch_range)
+    summary = run_batch(
+        read_manifest(str(offline_pipeline / "manifest.csv")),
+        current_date=datetime.date(2025, 5, 7),
+    )
+    assert calls == [("Rome", [datetime.date(2025, 5, 7), datetime.date(2025, 5, 8)])]
+    assert (summary["succeeded"], summary["failed"], summary["api_calls"]) == (2, 1, 0)
+    assert [report["status"] for report in summary["reports"]] == ["failed", "ok", "ok"]
+    assert sorted(path.name for path in offline_pipeline.glob("*.pdf")) == [
+        "Weather_Report_Rome_2025-05-07.pdf",
+        "Weather_Report_Rome_2025-05-08.pdf",
+    ]
+
+def test_job_queue_leases_expire_and_retries_are_bounded(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.sqlite3"), lease=0.2, max_attempts=2)
+    assert queue.enqueue("Rome", [datetime.date(2025, 5, 7), datetime.date(2025, 5, 8)]) == 2
+    first, second = queue.claim("a"), queue.claim("b")
+    assert first[1:] == ("Rome", "2025-05-07") and second[1:] == ("Rome", "2025-05-08")
+    assert queue.claim("c") is None
+    assert queue.complete(second[0], "b", "b.pdf")
+    time.sleep(0.3)
+    assert queue.claim("c")[0] == first[0]
+    assert not queue.complete(first[0], "a", "a.pdf")
+    time.sleep(0.3)
+    assert queue.claim("d") is None
+    assert queue.info() == {"done": 1, "failed": 1}
+
+def test_run_worker_retries_failed_jobs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    failures = iter([True])
+
+    def fake_generate_report(place, date):
+        if next(failures, False):
+            raise ConnectionError("API unavailable")
+        return f"{place}_{date}.pdf", b"%PDF-1.4"
+
+    monkeypatch.setattr(project, "generate_report", fake_generate_report)
+    queue = JobQueue(str(tmp_path / "queue.sqlite3"))
+    queue.enqueue("Rome", ["2025-05-07"])
+    assert run_worker(queue, drain=True, poll=0.1) == 2
+    assert queue.info() == {"done": 1}
+    assert queue.next_available() is None
+    assert (tmp_path / "Rome_2025-05-07.pdf").read_bytes() == b"%PDF-1.4"
+
+def test_tracer_records_stages_and_profiles_reports(offline_pipeline, monkeypatch):
+    tracer = Tracer(enabled=True)
+    monkeypatch.setattr(project, "tracer", tracer)
+    monkeypatch.setattr(project, "profile_dir", str(offline_pipeline / "profiles"))
+    generate_pdf(make_response(["2025-05-07"]), flag="current")
+    names = [event["name"] for event in tracer.events]
+    for stage in (
+        "index_days", "fetch_icons", "plot_current_condition", "plot_temperature",
+        "plot_graphs", "render_pdf", "pdf_output",
+    ):
+        assert stage in names
+    render = tracer.events[names.index("render_pdf")]
+    chart = tracer.events[names.index("plot_temperature")]
+    assert render["start"] <= chart["start"] and chart["duration"] <= render["duration"]
+    tracer.export(str(offline_pipeline / "trace.json"), format="chrome")
+    trace = json.loads((offline_pipeline / "trace.json").read_text())
+    assert len(trace["traceEvents"]) == len(names)
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in trace["traceEvents"])
+    assert (offline_pipeline / "profiles" / "Weather_Report_Rome_2025-05-07.prof").exists()
+
+def test_concurrent_reports_share_one_profiler(tmp_path, monkeypatch):
+    monkeypatch.setattr(project, "profile_dir", str(tmp_path))
+    monkeypatch.setattr(project, "metrics", Metrics())
+    profiling, finished = threading.Event(), threading.Event()
+
+    def first_report():
+        with project.measure_report() as report:
+            report["file_name"] = "first.pdf"
+            profiling.set()
+            finished.wait(10)
+
+    thread = threading.Thread(target=first_report)
+    thread.start()
+    profiling.wait(10)
+    try:
+        with project.measure_report() as report:
+            report["file_name"] = "second.pdf"
+    finally:
+        finished.set()
+        thread.join()
+    assert (tmp_path / "first.prof").exists() and not (tmp_path / "second.prof").exists()
+    assert project.metrics.total("weather_profiles_skipped_total") == 1
+    assert project.metrics.total("weather_reports_total") == 2
+
+def test_metrics_render_prometheus_text():
+    metrics = Metrics()
+    metrics.inc("weather_api_calls_total", endpoint="history")
+    metrics.inc("weather_api_calls_total", 2, endpoint="history")
+    metrics.inc("weather_api_calls_total", endpoint="forecast")
+    metrics.inc("weather_http_requests_total", 5, failed="false")
+    assert metrics.total("weather_api_calls_total") == 4
+    for seconds in (0.02, 0.3, 40):
+        metrics.observe("weather_report_seconds", seconds)
+    lines = metrics.render().splitlines()
+    assert "# TYPE weather_api_calls_total counter" in lines
+    assert 'weather_api_calls_total{endpoint="history"} 3' in lines
+    assert 'weather_report_seconds_bucket{le="0.025"} 1' in lines
+    assert 'weather_report_seconds_bucket{le="0.5"} 2' in lines
+    assert 'weather_report_seconds_bucket{le="+Inf"} 3' in lines
+    assert "weather_report_seconds_count 3" in lines
+
+def test_report_metrics_include_api_time_and_failures(monkeypatch):
+    monkeypatch.setattr(project, "metrics", Metrics())
+    monkeypatch.setattr(project, "progress", Progress("off"))
+    monkeypatch.setattr(project, "fixed_today", "2025-05-07")
+
+    def slow_api_error(place, dates, current_date):
+        time.sleep(0.1)
+        return {date: ({"error": {"message": "No matching location found."}}, "current") for date in dates}
+
+    monkeypatch.setattr(project, "fetch_range", slow_api_error)
+    with raises(ValueError):
+        project.generate_report("Rome", "2025-05-07")
+    monkeypatch.setattr(project, "fetch_range", lambda *args: 1 / 0)
+    dates = [datetime.date(2025, 5, 7), datetime.date(2025, 5, 8)]
+    assert [result["status"] for result in project.run_location("Rome", dates, dates[0])] == ["failed"] * 2
+    assert 'weather_reports_total{status="failed"} 3' in project.metrics.render()
+    assert project.metrics.histograms[("weather_report_seconds", ())]["sum"] >= 0.1
+    server = project.serve_metrics("127.0.0.1", 0)
+    try:
+        exposition = urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics").read().decode()
+        assert "weather_report_seconds_count 3" in exposition
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_fetch_range_reports_cache_metrics(tmp_path, monkeypatch):
+    monkeypatch.setattr(project, "metrics", Metrics())
+    monkeypatch.setattr(project, "progress", Progress("off"))
+    monkeypatch.setattr(project, "response_cache", ResponseCache(str(tmp_path / "cache.sqlite3")))
+    monkeypatch.setattr(project, "api_key", "test")
+    response = SimpleNamespace(status_code=200, json=lambda: {"forecast": {}})
+    monkeypatch.setattr(project, "fetch_all", lambda urls: [response for url in urls])
+    dates = [datetime.date(2025, 5, 1)]
+    fetch_range("Rome", dates, datetime.date(2025, 5, 7))
+    fetch_range("Rome", dates, datetime.date(2025, 5, 7))
+    exposition = project.metrics.render()
+    assert 'weather_api_calls_total{endpoint="history"} 1' in exposition
+    assert 'weather_cache_requests_total{endpoint="history",result="hit"} 1' in exposition
+    assert 'weather_cache_requests_total{endpoint="history",result="miss"} 1' in exposition
+    assert 'weather_stage_seconds_count{stage="fetch_range"} 2' in exposition
+
+def test_recorded_fixtures_replay_through_http_client(tmp_path, monkeypatch):
+    body = json.dumps(make_response(["2025-05-07"])).encode()
+    live = SimpleNamespace(status_code=200, headers={"Content-Type": "application/json"}, content=body)
+    client = HttpClient(retries=0)
+    monkeypatch.setattr(client, "session", SimpleNamespace(get=lambda url, timeout: live))
+    monkeypatch.setattr(project, "record_dir", str(tmp_path))
+    monkeypatch.setattr(project, "fixture_recorder", FixtureStore(str(tmp_path)))
+    client.get("https://api.weatherapi.com/v1/forecast.json?q=Rome&days=1&aqi=yes&key=secret")
+    assert b"secret" not in (tmp_path / "index.json").read_bytes()
+    monkeypatch.setattr(project, "record_dir", None)
+    monkeypatch.setattr(project, "replay_dir", str(tmp_path))
+    replay = HttpClient(retries=0)
+    response = replay.get("https://api.weatherapi.com/v1/forecast.json?aqi=yes&days=1&q=rome&key=other")
+    assert response.status_code == 200 and response.json() == json.loads(body)
+    assert replay.get("https://api.weatherapi.com/v1/forecast.json?q=Paris").status_code == 400
+
+def test_recording_bypasses_warm_caches(tmp_path, monkeypatch):
+    link = "//cdn.weatherapi.com/weather/64x64/day/113.png"
+    forecast = make_response(["2025-05-07"])
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    cache.put("forecast", "Rome", "2025-05-07:1", forecast, ttl=60)
+    icons = IconStore(str(tmp_path / "icons"))
+    icons.save(link, FakeIconResponse().content)
+
+    def live_get(url, timeout):
+        icon = url.endswith(".png")
+        return SimpleNamespace(
+            status_code=200,
+            headers={"Content-Type": "image/png" if icon else "application/json"},
+            content=FakeIconResponse().content if icon else json.dumps(forecast).encode(),
+            json=lambda: forecast,
+            raise_for_status=lambda: None,
+        )
+
+    client = HttpClient(retries=0)
+    monkeypatch.setattr(client, "session", SimpleNamespace(get=live_get))
+    monkeypatch.setattr(project, "http_client", client)
+    monkeypatch.setattr(project, "response_cache", cache)
+    monkeypatch.setattr(project, "icon_store", IconStore(str(tmp_path / "icons")))
+    monkeypatch.setattr(project, "progress", Progress("off"))
+    monkeypatch.setattr(project, "api_key", "test")
+    monkeypatch.setattr(project, "record_dir", str(tmp_path / "fixtures"))
+    monkeypatch.setattr(project, "fixture_recorder", FixtureStore(str(tmp_path / "fixtures")))
+    today = datetime.date(2025, 5, 7)
+    assert fetch_range("Rome", [today], today)[today][0] == forecast
+    project.fetch_icons([link])
+    fixtures = FixtureStore(str(tmp_path / "fixtures"))
+    assert fixtures.get("https://api.weatherapi.com/v1/forecast.json?q=Rome&days=1&aqi=yes") is not None
+    assert fixtures.get(f"https:{link}") is not None
+
+def test_mock_server_injects_latency_and_errors(tmp_path):
+    store = FixtureStore(str(tmp_path), latency=0.1, error_rate=0)
+    store.put("https://cdn.weatherapi.com/weather/64x64/day/113.png", 200, "image/png", b"png")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockHandler)
+    server.store = store
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        start = time.perf_counter()
+        assert urlopen(f"{base}/weather/64x64/day/113.png").read() == b"png"
+        assert time.perf_counter() - start >= 0.05
+        store.error_rate = 1
+        with raises(HTTPError) as error:
+            urlopen(f"{base}/weather/64x64/day/113.png")
+        assert error.value.code == 503
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_benchmark_stage_and_baseline_comparison(tmp_path):
+    calls = []
+    result = benchmark_stage(lambda: calls.append(bytearray(1 << 20)), warmup=2, repeats=5)
+    assert len(calls) == 2 + 5 + 1
+    assert result["repeats"] == 5 and 0 < result["mean"] <= result["p95"]
+    assert result["peak"] >= 1 << 20
+    baseline = {"plot_gust": {"mean": 0.1}, "index_days": {"mean": 0.001}}
+    results = {"plot_gust": {"mean": 0.11}, "index_days": {"mean": 0.002}, "new": {"mean": 1}}
+    assert compare_benchmarks(results, baseline, threshold=0.25) == ["index_days"]
+    with raises(ValueError):
+        run_benchmarks(str(tmp_path))
+
+@fixture
+def recorded_fixtures(tmp_path):
+    store = FixtureStore(str(tmp_path / "fixtures"))
+    store.put(
+        "https://api.weatherapi.com/v1/forecast.json?q=Rome&days=2&aqi=yes",
+        200, "application/json", json.dumps(make_response(["2025-05-07", "2025-05-08"])).encode(),
+    )
+    store.put(
+        "https://api.weatherapi.com/v1/history.json?q=Rome&dt=2025-05-01&end_dt=2025-05-03",
+        200, "application/json",
+        json.dumps(make_response(["2025-05-01", "2025-05-02", "2025-05-03"], current=False)).encode(),
+    )
+    for code in (113, 116):
+        store.put(f"https://cdn.weatherapi.com/weather/64x64/day/{code}.png", 200, "image/png", FakeIconResponse().content)
+    return store
+
+def test_cli_replays_fixtures_without_an_api_key(recorded_fixtures, tmp_path):
+    env = {
+        **os.environ,
+        "WEATHER_REPLAY": recorded_fixtures.directory,
+        "WEATHER_TODAY": "2025-05-07",
+        "WEATHER_CACHE_DIR": str(tmp_path / "cache"),
+        "WEATHER_PROGRESS": "off",
+    }
+    env.pop("WEATHER_API_KEY", None)
+    result = subprocess.run(
+        [sys.executable, project.__file__, "Rome", "2025-05-07"],
+        cwd=tmp_path, env=env, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert (tmp_path / "Weather_Report_Rome_2025-05-07.pdf").stat().st_size > 0
+
+def test_plan_load_follows_mix_and_fixtures(recorded_fixtures):
+    today, jobs = plan_load(recorded_fixtures, 50, mix="current=1,historical=1", seed=1)
+    assert today == "2025-05-07" and len(jobs) == 50
+    assert set(jobs) == {("rome", "2025-05-07"), ("rome", "2025-05-01"), ("rome", "2025-05-02"), ("rome", "2025-05-03")}
+    status, content_type, body = recorded_fixtures.get_covering(
+        "http://127.0.0.1/v1/history.json?q=rome&dt=2025-05-02&end_dt=2025-05-02"
+    )
+    assert [day["date"] for day in json.loads(body)["forecast"]["forecastday"]] == ["2025-05-02"]
+    assert recorded_fixtures.get_covering("http://127.0.0.1/v1/forecast.json?q=rome&days=3") is None
+
+def test_run_load_test_reports_throughput_and_latency(recorded_fixtures, monkeypatch):
+    monkeypatch.setattr(project, "load_mix", "forecast=1")
+    results = run_load_test(recorded_fixtures.directory, requests=2, levels=[2])
+    assert len(results) == 1
+    result = results[0]
+    assert (result["concurrency"], result["requests"], result["failed"]) == (2, 2, 0)
+    assert result["throughput"] > 0 and 0 < result["p50"] <= result["p95"] <= result["p99"]
+    assert project.api_base_url == "https://api.weatherapi.com/v1" and project.fixed_today is None
+
+def test_observation_archive_keeps_observations_and_queries_ranges(tmp_path):
+    archive = ObservationArchive(str(tmp_path / "archive.sqlite3"))
+    history = make_response(["2025-05-01", "2025-05-02"], current=False)
+    archive.store(Day.index_days(history, aqi=False).values(), "historical")
+    forecast = make_response(["2025-05-02", "2025-05-03"])
+    for hour in forecast["forecast"]["forecastday"][0]["hour"]:
+        hour["temp_c"] = 99.0
+    archive.store(Day.index_days(forecast).values(), "forecast")
+    hours = archive.query("Rome, Italy", "2025-05-02", "2025-05-03", ["temp_c", "wind_dir"])
+    assert len(hours["hour"]) == 48 and list(hours["hour"][:2]) == [0, 1]
+    assert 99.0 not in hours["temp_c"][:24] and hours["wind_dir"][0] == "NNE"
+    assert archive.info() == [("rome, italy (41.90, 12.48)", 3, "2025-05-01", "2025-05-03", 2)]
+    days = archive.load_days("rome", "2025-05-01", "2025-05-03")
+    original = Day.index_days(history, aqi=False)["2025-05-01"]
+    assert type(days["2025-05-01"]).__name__ == "HistoricalDay"
+    assert type(days["2025-05-03"]).__name__ == "ForecastDay"
+    assert dict(days["2025-05-01"].display()).keys() == dict(original.display()).keys()
+    assert list(days["2025-05-01"].hourly["pressure_mb"]) == list(original.hourly["pressure_mb"])
+    with raises(ValueError):
+        archive.query("rome", "2025-05-01", "2025-05-02", ["temp_c; DROP TABLE hours"])
+
+def test_observation_archive_keeps_places_sharing_a_name_apart(tmp_path):
+    archive = ObservationArchive(str(tmp_path / "archive.sqlite3"))
+    for country, lat, lon, temp_c in (("France", 48.87, 2.33, 10.0), ("United States of America", 33.66, -95.56, 30.0)):
+        response = make_response(["2025-05-01"], current=False)
+        response["location"].update(name="Paris", country=country, lat=lat, lon=lon)
+        for hour in response["forecast"]["forecastday"][0]["hour"]:
+            hour["temp_c"] = temp_c
+        archive.store(Day.index_days(response, aqi=False).values(), "historical")
+    assert [row[0] for row in archive.info()] == [
+        "paris, france (48.87, 2.33)",
+        "paris, united states of america (33.66, -95.56)",
+    ]
+    with raises(ValueError):
+        archive.query("Paris", "2025-05-01", "2025-05-01", ["temp_c"])
+    assert set(archive.query("Paris, France", "2025-05-01", "2025-05-01", ["temp_c"])["temp_c"]) == {10.0}
+    hours = archive.query("paris, united states of america (33.66, -95.56)", "2025-05-01", "2025-05-01", ["temp_c"])
+    assert set(hours["temp_c"]) == {30.0}
+
+def test_compute_trend_aggregates_daily_series():
+    import numpy
+    assert list(rolling(numpy.array([1.0, 2.0, 3.0, 4.0]), 2)) == [1.0, 1.5, 2.5, 3.5]
+    assert list(rolling(numpy.array([1.0, 2.0, 3.0, 4.0]), 3, total=True)) == [1.0, 3.0, 6.0, 9.0]
+    assert list(downsample(numpy.arange(10.0), 4)) == [1.0, 4.0, 7.0, 9.0]
+    days = Day.index_days(make_response(["2025-05-01", "2025-05-02"], current=False), aqi=False)
+    hours = {"date": numpy.array(["2025-05-01"] * 24 + ["2025-05-02"] * 24, dtype=object)}
+    for field in ("hour", *project.trend_fields):
+        hours[field] = numpy.concatenate([day.hourly[field] for day in days.values()])
+    trend = compute_trend(hours, window=2, max_points=12)
+    assert list(trend["dates"]) == ["2025-05-01", "2025-05-02"]
+    assert list(trend["temp_c_min"]) == [10.0, 10.0] and list(trend["temp_c_max"]) == [21.5, 21.5]
+    assert list(trend["temp_c_mean"]) == [15.75, 15.75]
+    assert round(trend["precip_mm_total"][0], 6) == 4.6 and round(trend["precip_mm_cumulative"][1], 6) == 9.2
+    assert len(trend["hourly_temp_c"]) == len(trend["hourly_position"]) == 12
+
+def test_generate_trend_report_reads_only_the_archive(offline_pipeline, monkeypatch):
+    dates = [str(datetime.date(2025, 3, 1) + datetime.timedelta(days=day)) for day in range(21)]
+    history = make_response(dates, current=False)
+    project.observation_archive.store(Day.index_days(history, aqi=False).values(), "historical")
+    monkeypatch.setattr(project, "fetch_range", lambda *args: 1 / 0)
+    assert generate_trend_report("rome", "2025-03-01", "2025-03-31") == "Weather_Trend_Rome_2025-03-01_2025-03-31.pdf"
+    assert (offline_pipeline / "Weather_Trend_Rome_2025-03-01_2025-03-31.pdf").stat().st_size > 0
+    with raises(ValueError):
+        generate_trend_report("Paris", "2025-03-01", "2025-03-31")
+    with raises(ValueError):
+        generate_trend_report("Rome", "2025-03-31", "2025-03-01")